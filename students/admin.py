@@ -9,11 +9,19 @@ from classes.models import Course, Semester
 #######################
 from django import forms
 from django.conf.urls import url
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.decorators import permission_required
-from django.db import models
-
+from django.core.cache import cache
+from django.db import models, transaction
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils.timezone import now
+
+from . import utils
+from .mixins import EstimatedCountAdminMixin, SearchBackendAdminMixin
 from .models import (
+    STUDENT_STATUS_CHOICES,
     History,
     RequirementTag,
     SectionRequirement,
@@ -21,7 +29,17 @@ from .models import (
     Student_Registration,
     iclicker,
 )
-from .views.admin import AdminClasslistUploadFormView, AdminReportUploadFormView
+from .signals import get_generation
+from .utils.roster import roster_labels
+from .views.admin import (
+    AdminClasslistUploadFormView,
+    AdminReportUploadFormView,
+    AdminRosterExportView,
+    AdminSectionLookupView,
+    AdminStudentLookupView,
+    roster_response,
+)
+from .widgets import LookupSelect
 
 # from django.utils.translation import ugettext_lazy as _
 
@@ -37,9 +55,120 @@ mark_inactive.short_description = "Mark selected items as inactive"
 ##############################################################
 
 
+def _bulk_update(modeladmin, request, queryset, tag, info, **changes):
+    """
+    Update all of the objects in the queryset with a single query, and
+    record the history of each with bulk inserts, in one transaction.
+    (The objects must be related to students.)
+    """
+    with transaction.atomic():
+        object_list = list(queryset.for_display())
+        for obj in object_list:
+            for field, value in changes.items():
+                setattr(obj, field, value)
+        count = queryset.update(modified=now(), **changes)
+        utils.bulk_history(object_list, tag, info, user=request.user)
+    opts = queryset.model._meta
+    name = opts.verbose_name if count == 1 else opts.verbose_name_plural
+    modeladmin.message_user(
+        request, "{} {} updated: {}.".format(count, name, info), messages.SUCCESS
+    )
+    return count
+
+
+def deactivate_selected(modeladmin, request, queryset):
+    _bulk_update(
+        modeladmin,
+        request,
+        queryset.filter(active=True),
+        "admin.deactivate_selected",
+        "Deactivated",
+        active=False,
+    )
+
+
+deactivate_selected.short_description = (
+    "Deactivate selected items (recorded in history)"
+)
+
+
+def set_status(modeladmin, request, queryset):
+    status = request.POST.get("status", "")
+    status_display = dict(STUDENT_STATUS_CHOICES).get(status)
+    if status_display is None:
+        modeladmin.message_user(request, "Choose the status to set.", messages.WARNING)
+        return
+    _bulk_update(
+        modeladmin,
+        request,
+        queryset.exclude(status=status),
+        "admin.set_status",
+        "Status set to {}".format(status_display),
+        status=status,
+    )
+
+
+set_status.short_description = "Set the status of selected registrations"
+
+
+def mark_aurora_verified(modeladmin, request, queryset):
+    _bulk_update(
+        modeladmin,
+        request,
+        queryset.filter(aurora_verified=False),
+        "admin.mark_aurora_verified",
+        "Marked as Aurora verified",
+        aurora_verified=True,
+    )
+
+
+mark_aurora_verified.short_description = "Mark selected registrations as verified"
+
+
+def reset_aurora_verification(modeladmin, request, queryset):
+    """
+    Go to the classlist upload for the sections of the selected
+    registrations.  Uploading the classlist of one of these sections
+    clears the Aurora verification of its registrations and verifies
+    the ones on the classlist again; nothing changes until then.
+    """
+    section_pks = sorted(set(queryset.values_list("section", flat=True)))
+    return redirect(
+        "{}?reverify={}".format(
+            reverse("{}:students_classlist_upload".format(modeladmin.admin_site.name)),
+            ",".join("{}".format(pk) for pk in section_pks),
+        )
+    )
+
+
+reset_aurora_verification.short_description = (
+    "Re-check the sections of selected registrations against Aurora"
+)
+
+
+def export_roster(modeladmin, request, queryset):
+    section_pks = set(queryset.values_list("section", flat=True))
+    return roster_response(queryset, roster_labels(section_pks), "roster.csv")
+
+
+export_roster.short_description = "Export a roster (CSV) of selected registrations"
+
+
+class StatusActionForm(ActionForm):
+    status = forms.ChoiceField(
+        choices=[("", "---------")] + list(STUDENT_STATUS_CHOICES), required=False
+    )
+
+
+##############################################################
+
+
 class UsedRelatedValuesFilter(admin.SimpleListFilter):
     """
     A custom filter, so that we only see related values which are used.
+    The used values come from a DISTINCT query on the related column,
+    and are cached for ``cache_timeout`` seconds, or until the table
+    of the admin model changes.
     """
 
     # Define a subclass and set these appropriately:
@@ -49,6 +178,10 @@ class UsedRelatedValuesFilter(admin.SimpleListFilter):
     allow_none = True
     reverse = False
     model = object
+    # When set, labels are values_label() of these (concrete) fields of the
+    #   model (a values() projection), rather than object_label() of each object.
+    label_fields = None
+    cache_timeout = 300
 
     def object_label(self, o):
         """
@@ -56,15 +189,39 @@ class UsedRelatedValuesFilter(admin.SimpleListFilter):
         """
         return "{}".format(o)
 
+    def values_label(self, *values):
+        """
+        Override this to customize the labelling of the label_fields values
+        """
+        return " ".join("{}".format(v) for v in values)
+
+    def used_lookups(self, qs):
+        """
+        Returns a list of (pk, label) for the related values used in qs.
+        """
+        used_pks = list(
+            qs.order_by().values_list(self.parameter_name, flat=True).distinct()
+        )
+        related_qs = self.model.objects.filter(pk__in=used_pks)
+        if self.label_fields is not None:
+            return [
+                (row[0], self.values_label(*row[1:]))
+                for row in related_qs.values_list("pk", *self.label_fields)
+            ]
+        return [(o.pk, self.object_label(o)) for o in related_qs]
+
     def lookups(self, request, model_admin):
         """
         Returns a list of tuples (coded-value, title).
         """
         qs = model_admin.get_queryset(request)
-        related_qs = self.model.objects.filter(
-            pk__in=qs.values_list(self.parameter_name, flat=True)
+        cache_key = "students:admin:{}:{}:{}".format(
+            qs.model._meta.label_lower, self.parameter_name, get_generation(qs.model)
         )
-        lookups = [(o.pk, self.object_label(o)) for o in related_qs]
+        lookups = cache.get(cache_key)
+        if lookups is None:
+            lookups = self.used_lookups(qs)
+            cache.set(cache_key, lookups, self.cache_timeout)
         if self.reverse:
             lookups.reverse()
         if self.allow_none:
@@ -115,9 +272,34 @@ class CourseFilter(UsedRelatedValuesFilter):
     parameter_name = "section__course"
     allow_none = False
     model = Course
+    label_fields = ("department__code", "code")
 
-    def object_label(self, o):
-        return o.label
+
+##############################################################
+
+
+class LookupAdminMixin(object):
+    """
+    Use the student and section lookups (see StudentRegistrationAdmin.get_urls)
+    for the foreign keys named in ``lookup_fields``.
+    """
+
+    lookup_fields = {
+        "student": "students_student_lookup",
+        "section": "students_section_lookup",
+    }
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.lookup_fields:
+            kwargs["widget"] = LookupSelect(
+                db_field.remote_field,
+                self.admin_site,
+                self.lookup_fields[db_field.name],
+                using=kwargs.get("using"),
+            )
+        return super(LookupAdminMixin, self).formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
 
 
 ##############################################################
@@ -147,7 +329,7 @@ class HistoryInline(admin.TabularInline):
         return qs.none()
 
 
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(SearchBackendAdminMixin, EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ["person", "student_number"]
     list_filter = ["active", "created", "modified"]
     list_select_related = True
@@ -163,7 +345,7 @@ admin.site.register(Student, StudentAdmin)
 ##############################################################
 
 
-class iclickerAdmin(admin.ModelAdmin):
+class iclickerAdmin(LookupAdminMixin, SearchBackendAdminMixin, admin.ModelAdmin):
     list_display = ["iclicker_id", "student", "active"]
     list_filter = ["active"]
     list_select_related = ["student__person"]
@@ -173,8 +355,7 @@ class iclickerAdmin(admin.ModelAdmin):
         "student__person__username",
         "student__student_number",
     ]
-    actions = [mark_inactive]
-    raw_id_fields = ("student",)
+    actions = [deactivate_selected]
 
 
 admin.site.register(iclicker, iclickerAdmin)
@@ -182,7 +363,12 @@ admin.site.register(iclicker, iclickerAdmin)
 ##############################################################
 
 
-class StudentRegistrationAdmin(admin.ModelAdmin):
+class StudentRegistrationAdmin(
+    LookupAdminMixin,
+    SearchBackendAdminMixin,
+    EstimatedCountAdminMixin,
+    admin.ModelAdmin,
+):
     list_display = ["student", "section", "status", "aurora_verified"]
     list_filter = [
         "active",
@@ -204,8 +390,14 @@ class StudentRegistrationAdmin(admin.ModelAdmin):
         "student__person__username",
         "student__student_number",
     ]
-    actions = [mark_inactive]
-    raw_id_fields = ("student", "section")
+    actions = [
+        deactivate_selected,
+        set_status,
+        mark_aurora_verified,
+        reset_aurora_verification,
+        export_roster,
+    ]
+    action_form = StatusActionForm
 
     def get_urls(self):
         """
@@ -225,8 +417,34 @@ class StudentRegistrationAdmin(admin.ModelAdmin):
             report_upload_view
         )
 
+        student_lookup_view = self.admin_site.admin_view(
+            AdminStudentLookupView.as_view()
+        )
+        section_lookup_view = self.admin_site.admin_view(
+            AdminSectionLookupView.as_view()
+        )
+        roster_export_view = self.admin_site.admin_view(AdminRosterExportView.as_view())
+        roster_export_view = permission_required(
+            "students.change_student_registration"
+        )(roster_export_view)
+
         urls = super(StudentRegistrationAdmin, self).get_urls()
         urls = [
+            url(
+                r"^lookup/student/$",
+                student_lookup_view,
+                name="students_student_lookup",
+            ),
+            url(
+                r"^lookup/section/$",
+                section_lookup_view,
+                name="students_section_lookup",
+            ),
+            url(
+                r"^roster/(?P<section_pk>\d+)/$",
+                roster_export_view,
+                name="students_roster_export",
+            ),
             url(
                 r"^classlist-upload/$",
                 classlist_upload_view,
@@ -15,6 +15,17 @@ class StudentsConfig(AppConfig):
         Any app specific startup code, e.g., register signals,
         should go here.
         """
+        from django.db.models.signals import post_delete, post_save
+
+        from .models import Student_Registration
+        from .signals import bump_generation
+
+        for signal in [post_save, post_delete]:
+            signal.connect(
+                bump_generation,
+                sender=Student_Registration,
+                dispatch_uid="students_registration_generation",
+            )
 
 
 #########################################################################
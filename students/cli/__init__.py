@@ -4,13 +4,22 @@ Utility functions for command line interface management scripts.
 #######################
 from __future__ import print_function, unicode_literals
 
+import csv
+import json
+import sys
+from functools import lru_cache
+
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils import six
 from django.utils.encoding import force_text
 
 #######################
 ################################################################
 
+DEFAULT_CHUNK_SIZE = 2000
+OUTPUT_FORMATS = ["tsv", "csv", "jsonl"]
 
 ################################################################
 
@@ -81,6 +90,8 @@ def resolve_fields(object, field_list):
     """
     if isinstance(field_list, six.string_types):
         field_list = [field_list]
+    if hasattr(object, "_meta"):
+        return iter(compile_field_paths(object.__class__, field_list).resolve(object))
     return (_resolve_lookup(object, field) for field in field_list)
 
 
@@ -102,35 +113,377 @@ def object_with_fields(object, fields=None):
 ################################################################
 
 
-def object_detail(object, m2m_fields=None, related_only=None, related_exclude=None):
+def _related_sets(model):
     """
-    Print details of an object.
+    Map the accessor names of the to-many reverse relations of the model
+    (e.g., ``student_registration_set``) to the relations themselves.
+    """
+    return dict(
+        (rel.get_accessor_name(), rel)
+        for rel in model._meta.get_fields()
+        if rel.auto_created
+        and not rel.concrete
+        and (rel.one_to_many or rel.many_to_many)
+        and rel.get_accessor_name()
+    )
+
+
+################################################################
+
+
+def object_detail_list(
+    objects, m2m_fields=None, related_only=None, related_exclude=None
+):
+    """
+    Generate the details of several objects (a queryset or a list of
+    instances of one model), as for ``object_detail()``.
+
+    Related sets are discovered from the model ``_meta`` and fetched for
+    all of the objects with a single ``prefetch_related()`` batch.
     """
     if m2m_fields is None:
         m2m_fields = []
     if related_exclude is None:
         related_exclude = []
-    result = object_with_fields(object) + "\n"
-    # m2m fields:
-    for field in m2m_fields:
-        result += (
-            "\t"
-            + field
-            + "\t"
-            + ", ".join(["{}".format(o) for o in getattr(object, field).all()])
-            + "\n"
-        )
+    objects = list(objects)
+    if not objects:
+        return
+    relations = _related_sets(objects[0].__class__)
     if related_only is None:
-        related_sets = [attr for attr in dir(object) if attr.endswith("_set")]
+        related_sets = sorted(relations)
     else:
         related_sets = related_only
+    related_sets = [attr for attr in related_sets if attr not in related_exclude]
+
+    lookups = list(m2m_fields)
     for attr in related_sets:
-        if attr in related_exclude:
-            continue
-        related = getattr(object, attr)
-        for rel_obj in related.all():
-            result += object_with_fields(rel_obj) + "\n"
-    return result
+        rel = relations.get(attr)
+        if rel is None:
+            lookups.append(attr)
+        else:
+            queryset = rel.related_model._default_manager.select_related()
+            lookups.append(Prefetch(attr, queryset=queryset))
+    prefetch_related_objects(objects, *lookups)
+
+    for object in objects:
+        result = object_with_fields(object) + "\n"
+        # m2m fields:
+        for field in m2m_fields:
+            result += (
+                "\t"
+                + field
+                + "\t"
+                + ", ".join(["{}".format(o) for o in getattr(object, field).all()])
+                + "\n"
+            )
+        for attr in related_sets:
+            for rel_obj in getattr(object, attr).all():
+                result += object_with_fields(rel_obj) + "\n"
+        yield result
+
+
+def print_object_details(
+    model, pk_list, m2m_fields=None, related_only=None, related_exclude=None
+):
+    """
+    Print the details of the objects of the model with the given pks
+    (in that order), as for ``object_detail_list()``, noting any pks
+    which do not exist.
+    """
+    pk_list = ["{}".format(pk) for pk in pk_list]
+    obj_list = sorted(
+        model.objects.filter(pk__in=pk_list).select_related(),
+        key=lambda obj: pk_list.index("{}".format(obj.pk)),
+    )
+    found = set("{}".format(obj.pk) for obj in obj_list)
+    for pk in pk_list:
+        if pk not in found:
+            print("[!] No {} with pk {}".format(model._meta.verbose_name, pk))
+    for detail in object_detail_list(
+        obj_list, m2m_fields, related_only, related_exclude
+    ):
+        print(detail)
+
+
+################################################################
+
+
+def object_detail(object, m2m_fields=None, related_only=None, related_exclude=None):
+    """
+    Print details of an object.
+    """
+    for result in object_detail_list(
+        [object], m2m_fields, related_only, related_exclude
+    ):
+        return result
+
+
+################################################################
+
+
+def keyset_iterator(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate over the queryset in primary key order, one page at a time.
+
+    Each page is a ``pk > last_pk`` range query of at most ``chunk_size``
+    rows, so the cost of a page does not grow as the listing progresses
+    (unlike offset slicing) and no more than one page is held in memory.
+    ``values()`` querysets work as well, provided ``pk`` is one of the
+    values.
+    """
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        count = 0
+        for item in page[:chunk_size].iterator():
+            count += 1
+            last_pk = item["pk"] if isinstance(item, dict) else item.pk
+            yield item
+        if count < chunk_size:
+            return
+
+
+################################################################
+
+
+class CompiledFieldPaths(object):
+    """
+    The result of ``compile_field_paths()``: how to obtain the values
+    of a list of (dotted) field paths for a model.
+
+    Paths made up of model fields only (e.g., ``person.cn``) have an
+    ORM lookup (``person__cn``), so they can be fetched by a ``values()``
+    projection or read from ``select_related()`` objects.  Any path
+    involving a method or a property falls back to per-object resolution
+    (the template engine style lookup of ``_resolve_lookup()``).
+    """
+
+    def __init__(self, model, field_list):
+        self.model = model
+        self.field_list = list(field_list)
+        self.lookups = {}  # field path -> ORM lookup, for projections.
+        # field path -> the ORM lookups of its related objects (foreign keys).
+        self.joins = {}
+        self.fallback = []  # field paths requiring per-object resolution.
+        self._getters = []
+        related = set()
+        for field_path in self.field_list:
+            lookup, joins, is_field = self._compile(field_path)
+            if joins:
+                related.add("__".join(joins))
+            if lookup is not None:
+                self.lookups[field_path] = lookup
+                self.joins[field_path] = [
+                    "__".join(joins[: n + 1]) for n in range(len(joins))
+                ]
+            if is_field:
+                self._getters.append(_attribute_getter(field_path))
+            else:
+                self.fallback.append(field_path)
+                self._getters.append(
+                    lambda o, field_path=field_path: _resolve_lookup(o, field_path)
+                )
+        # drop paths that are covered by a longer path:
+        self.select_related = sorted(
+            p for p in related if not any(q.startswith(p + "__") for q in related)
+        )
+
+    def _compile(self, field_path):
+        """
+        Returns ``(lookup, joins, is_field)`` for the field path.
+        ``lookup`` is None when the path cannot be projected.
+        """
+        opts = self.model._meta
+        bits = field_path.split(".")
+        joins = []
+        for idx, bit in enumerate(bits):
+            try:
+                field = opts.get_field(bit)
+            except FieldDoesNotExist:
+                return None, joins, False  # a property or method.
+            last = idx + 1 == len(bits)
+            if not field.is_relation:
+                if last:
+                    return "__".join(bits), joins, True
+                return None, joins, False  # e.g., a method of a value.
+            if field.many_to_many or field.one_to_many:
+                return None, joins, False  # not a single value.
+            joins.append(bit)
+            if last:
+                return None, joins, True  # the related object itself.
+            opts = field.related_model._meta
+        return None, joins, False
+
+    @property
+    def is_projection(self):
+        """
+        True when every field path can be fetched with ``values()``.
+        """
+        return len(self.lookups) == len(self.field_list)
+
+    def values(self, queryset):
+        """
+        Return the ``values()`` projection of the queryset: the
+        primary key and the lookup of every field path.
+        """
+        assert self.is_projection, "Not every field path can be projected"
+        fields = set(self.lookups.values())
+        for joins in self.joins.values():
+            fields.update(joins)
+        return queryset.values("pk", *fields)
+
+    def objects(self, queryset):
+        """
+        Return the queryset, joined for per-object resolution.
+        """
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset
+
+    def resolve(self, item):
+        """
+        Resolve the field paths into a list of strings, from either a model
+        instance or a row of the ``values()`` projection.
+        """
+        if isinstance(item, dict):
+            return [self._resolve_value(item, f) for f in self.field_list]
+        return [getter(item) for getter in self._getters]
+
+    def _resolve_value(self, row, field_path):
+        """
+        The field path from a row of the ``values()`` projection: as for
+        an object, a missing related object resolves as the empty string.
+        """
+        if any(row[join] is None for join in self.joins[field_path]):
+            return ""
+        return force_text(row[self.lookups[field_path]])
+
+
+################################################################
+
+
+def _attribute_getter(field_path):
+    """
+    Plain attribute resolution for a field path known to consist only of
+    model fields; a missing related object resolves as the empty string.
+    """
+    bits = field_path.split(".")
+
+    def _get(current):
+        for bit in bits:
+            if current is None:
+                return ""
+            current = getattr(current, bit)
+        return force_text(current)
+
+    return _get
+
+
+################################################################
+
+
+@lru_cache(maxsize=None)
+def _compile_field_paths(model, field_tuple):
+    return CompiledFieldPaths(model, field_tuple)
+
+
+def compile_field_paths(model, field_list):
+    """
+    Compile the (dotted) field_list for the given model; see
+    ``CompiledFieldPaths``.  Results are cached.
+    """
+    if isinstance(field_list, six.string_types):
+        field_list = [field_list]
+    return _compile_field_paths(model, tuple(field_list))
+
+
+################################################################
+
+
+def related_paths(model, field_list):
+    """
+    Determine the ``select_related()`` paths required to resolve the
+    (dotted) field_list against instances of the given model.
+    """
+    return compile_field_paths(model, field_list).select_related
+
+
+################################################################
+
+
+def write_rows(rows, header=None, output_format="tsv", stream=None):
+    """
+    Write an iterable of rows (lists of strings) to the stream as
+    tab delimited, comma delimited, or JSON lines (``jsonl``) output.
+    The ``jsonl`` format requires a header; it provides the keys.
+    Rows are written as they are consumed.
+    """
+    if stream is None:
+        stream = sys.stdout
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError("Unknown output format: {0!r}".format(output_format))
+    if output_format == "csv":
+        writer = csv.writer(stream)
+        if header is not None:
+            writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+    elif output_format == "jsonl":
+        assert header is not None, "JSON lines output requires a header"
+        for row in rows:
+            stream.write(json.dumps(dict(zip(header, row))) + "\n")
+    else:
+        for row in rows:
+            stream.write("\t".join(row) + "\n")
+
+
+################################################################
+
+
+def stream_listing(
+    queryset,
+    field_list=None,
+    output_format="tsv",
+    stream=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    select_related=None,
+    label=True,
+):
+    """
+    Write the listing of the queryset: the primary key, the string
+    representation (unless ``label`` is False), and the values of the
+    (dotted) field_list of each object.
+
+    Relations needed for the field_list are joined automatically;
+    give ``select_related`` for any relations needed by the string
+    representation of the objects.  Without the label, a field_list of
+    plain model fields is fetched as a ``values()`` projection, and no
+    model instances are created at all.
+    """
+    if field_list is None:
+        field_list = []
+    compiled = compile_field_paths(queryset.model, field_list)
+
+    if not label and compiled.is_projection:
+        queryset = compiled.values(queryset)
+    else:
+        queryset = compiled.objects(queryset)
+        if label and select_related:
+            queryset = queryset.select_related(*select_related)
+
+    def _rows():
+        for item in keyset_iterator(queryset, chunk_size):
+            pk = item["pk"] if isinstance(item, dict) else item.pk
+            row = ["{}".format(pk)]
+            if label:
+                row.append("{}".format(item))
+            yield row + compiled.resolve(item)
+
+    header = ["pk"]
+    if label:
+        header.append(queryset.model._meta.model_name)
+    write_rows(_rows(), header + list(field_list), output_format, stream)
 
 
 ################################################################
@@ -1,71 +1,72 @@
-#!/usr/bin/env python
-#! -*- encoding: utf-8 -*-
 """
+Check alphabetical room assignments against the current classlist.
+
+The assignment is a CSV of (room, seat count, student count, extra, start)
+rows; the classlist is that of the given sections.
 """
 #######################
 from __future__ import print_function, unicode_literals
 
 import csv
-import os
-import pprint
-import random
 import sys
+from optparse import make_option
+
+from classes.models import Section
 
-import spreadsheet
+from ..utils.exam_rooms import SEATS_PER_STUDENT, count_by_start, exam_classlist
+from .generate_ab_room_assign import csv_load
 
 #######################
-SEATS_PER_STUDENT = 2
 
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--assignment",
+        help="Specify the CSV file of the room assignment",
+    ),
+    make_option(
+        "--seats-per-student",
+        dest="seats_per_student",
+        type=int,
+        default=SEATS_PER_STUDENT,
+        help="Number of seats for each student (Default: 2)",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = "--assignment <csv> <section_pk> [section_pk [...]]"
 
-def get_student_count(classlist, start, finish):
+
+def get_results(rooms, classlist, roomdict, startdict, seats_per_student):
     """
-    [start, finish), in the python style.
+    One row per room: room, capacity, count, spare student seats, start.
     """
-    count = 0
-    for student_row in classlist:
-        name = student_row[0].lower()
-        if start <= name < finish:
-            count += 1
-    return count
-
+    counts = count_by_start(classlist, [startdict[room] for room in rooms])
+    return [
+        [
+            room,
+            roomdict[room],
+            count,
+            roomdict[room] // seats_per_student - count,
+            startdict[room].lower(),
+        ]
+        for room, count in zip(rooms, counts)
+    ]
 
-def get_results(
-    rooms, classlist, roomdict, startdict, seats_per_student=SEATS_PER_STUDENT
-):
 
-    results = []
-    for room_idx in range(len(rooms)):
-        if room_idx + 1 == len(rooms):
-            finish = "|"  # sorts after 'z'
-        else:
-            finish = startdict[rooms[room_idx + 1]].lower()
-        room = rooms[room_idx]
-        start = startdict[room].lower()
-        count = get_student_count(classlist, start, finish)
-        capacity = roomdict[room]
-        results.append(
-            [room, capacity, count, capacity // seats_per_student - count, start]
-        )
-    return results
-
-
-def main(
-    classlist_fn, assignment_fn, seats_per_student=SEATS_PER_STUDENT, max_letters=2
-):
-    classlist = spreadsheet.readSheet(classlist_fn)  # list of (name, number, section)
-    assignment_list = csv_load.main(
-        assignment_fn
-    )  # room, seat count, student count, extra, start
+def main(options, args):
+    if not args or not options.get("assignment"):
+        print("Error: you must supply an assignment CSV file and one or more section pks")
+        return
+    section_list = Section.objects.filter(pk__in=",".join(args).split(","))
+    classlist = exam_classlist(section_list)
+    # room, seat count, student count, extra, start
+    assignment_list = csv_load(options["assignment"])
     roomdict = dict([(e[0], int(e[1])) for e in assignment_list])
     startdict = dict([(e[0], e[4]) for e in assignment_list])
     rooms = [e[0] for e in assignment_list]
 
     csv_writer = csv.writer(sys.stdout)
-    for row in get_results(rooms, classlist, roomdict, startdict):
+    for row in get_results(
+        rooms, classlist, roomdict, startdict, options["seats_per_student"]
+    ):
         csv_writer.writerow(row)
-
-
-if __name__ == "__main__":
-    classlist_filename = sys.argv[1]
-    assignment_filename = sys.argv[2]
-    main(classlist_filename, assignment_filename)
@@ -2,6 +2,9 @@
 This program is designed to filter out students from a class that
 have been dropped in the internal FIPPA database.
 
+A WebAssign roster (CSV) is written for each section; by default, every
+active section of the current term.
+
 When uploading results:
 * Select "Mark these usernames as dropped"
 and DO NOT check:
@@ -24,71 +27,107 @@ You have been dropped from WebAssign because you did not successfully complete t
 
 To get back on to WebAssign, you need to download and complete the paper honesty declaraction from http://www.stats.umanitoba.ca/media/statsweb/files/2010/10/honesty.pdf and return it to your instructor.
 
-Course: {{ section.Course }}
-Section: {{ section.Section_Name }}
-Instructor: {{ section.Instructor }}
-            http://www.stats.umanitoba.ca{{ section.Instructor.get_directory_href }}
+Course: {{ section.course }}
+Section: {{ section.section_name }}
+Instructor: {{ section.instructor }}
+            http://www.stats.umanitoba.ca{{ section.instructor.get_directory_href }}
 ======================================
 
 After you receive a signed paper honesty declaration, please email me with the student's information and I will reinstate the student in WebAssign.
 
 """
+
 #######################
 from __future__ import print_function, unicode_literals
 
+import io
 import os
+from itertools import groupby
+from optparse import make_option
+
+from classes.models import Semester
+
+from ..models import Student_Registration
+from . import write_rows
+
+#######################
 
-from classes.models import Section
-from students.models import Student_Registration
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--status",
+        default="CC",
+        help="Only registrations with this status (Default: CC); "
+        + "use an empty value for all registrations in good standing",
+    ),
+    make_option(
+        "--output-dir",
+        dest="output_dir",
+        default="~/tmp/",
+        help="Directory for the roster files (Default: ~/tmp/)",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = "[section_pk [...]]"
+
+HEADER = ["username", "fullname", "password", "email"]
 
 #######################
 
 
-def filename(section):
-    return (
-        (section.Course.Short_Name + " " + section.Section_Name)
-        .replace(":", "_")
-        .replace(" ", "_")
-        .replace("__", "_")
-        .lower()
+def droplist_rows(sections=None, status="CC"):
+    """
+    Yield ``(section slug, rows)`` pairs, with rows of
+    ``(username, fullname, password, email)``,
+    from a single (streamed) query across all of the sections.
+    Good standing is determined by the database.
+    The rows of each section are a generator: consume them before
+    moving on to the next section.
+    """
+    filters = {}
+    if sections is None:
+        filters["section__term__in"] = Semester.objects.get_current_qs()
+    else:
+        filters["section__in"] = sections
+    if status:
+        filters["status"] = status
+    qs = (
+        Student_Registration.objects.reg_list(good_standing=True, **filters)
+        .with_email()
+        .order_by("section__slug", "student__person__sn", "student__person__given_name")
+        .values_list(
+            "section__slug",
+            "student__person__username",
+            "student__person__cn",
+            "preferred_email",
+        )
     )
+    for slug, rows in groupby(qs.iterator(), key=lambda row: row[0]):
+        yield slug, (
+            [username or "", cn or "", "", email or ""]
+            for _, username, cn, email in rows
+        )
 
 
-def do_droplist(section):
-    lines = ["username,fullname,password,email"]
-    # for student in Student.objects.all().filter(Account_Created= True, Active= True, Permission_Given=True, Sections= section):
-    for reg in Student_Registration.objects.filter(
-        Active=True, section=section, status="CC"
-    ):
-        if reg.good_standing():
-            student = reg.student
-            line = (
-                student.UMnetID
-                + ',"'
-                + student.Name
-                + '",'
-                + student.Initial_Password
-                + ","
-                + student.Email
-            )
-            lines.append(line)
-
-    csv = "\n".join(lines)
-    output_fn = filename(section) + ".csv"
-    print(output_fn)
-    open(output_fn, "w").write(csv.encode("utf-8", "replace"))
-    if not os.path.exists(os.path.expanduser("~/tmp/")):
-        os.mkdir(os.path.expanduser("~/tmp/"))
-    os.rename(output_fn, os.path.expanduser("~/tmp/") + output_fn)
-
-
-def main():
-    sections = Section.objects.all().filter(Active=True, Using_WebAssign=True)
-    for section in sections:
-        do_droplist(section)
-
-
-if __name__ == "__main__":
-    main()
-
-#
+def write_droplist(output_dir, slug, rows):
+    """
+    Write one section roster; returns the filename.
+    """
+    output_fn = os.path.join(output_dir, slug.replace("-", "_") + ".csv")
+    with io.open(output_fn, "w", encoding="utf-8", newline="") as f:
+        write_rows(rows, HEADER, "csv", f)
+    return output_fn
+
+
+def main(options, args):
+    output_dir = os.path.expanduser(options["output_dir"])
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    sections = ",".join(args).split(",") if args else None
+
+    # each section is written as its rows arrive: only one row is held.
+    for slug, rows in droplist_rows(sections, options["status"]):
+        print(write_droplist(output_dir, slug, rows))
+
+
+#######################
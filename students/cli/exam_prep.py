@@ -0,0 +1,102 @@
+"""
+Prepare an exam for the given sections: the master list, the alphabetical
+room assignment, the exam room listing and the sign in sheets (as PDFs).
+
+Rooms are given as a CSV of (room, capacity) pairs, in the order they
+should take the alphabet.
+"""
+
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from classes.models import Section
+
+from ..utils.exam_prep import prepare_exam
+from ..utils.exam_rooms import MAX_LETTERS, SEATS_PER_STUDENT, InsufficientCapacity
+from .generate_ab_room_assign import load_rooms
+
+#######################
+
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--rooms",
+        help="Specify a CSV file of (room, capacity) pairs",
+    ),
+    make_option(
+        "--output-dir",
+        dest="output_dir",
+        default=".",
+        help="Directory for the generated files (Default: current directory)",
+    ),
+    make_option("--course", default="", help="Course name, e.g., STAT 1000"),
+    make_option("--exam", default="", help="Exam name, e.g., Final Exam"),
+    make_option("--date", default="", help="Exam date"),
+    make_option("--time", default="", help="Exam time"),
+    make_option(
+        "--seats-per-student",
+        dest="seats_per_student",
+        type=int,
+        default=SEATS_PER_STUDENT,
+        help="Number of seats for each student (Default: 2)",
+    ),
+    make_option(
+        "--max-letters",
+        dest="max_letters",
+        type=int,
+        default=MAX_LETTERS,
+        help="Number of letters of the family name that define a block "
+        + "of students (Default: 2)",
+    ),
+    make_option(
+        "--no-pdf",
+        action="store_false",
+        dest="compile",
+        default=True,
+        help="Only generate the LaTeX and CSV files; do not run pdflatex",
+    ),
+    make_option(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of pdflatex processes to run at once (Default: number of CPUs)",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = "--rooms <csv> <section_pk> [section_pk [...]]"
+
+#######################
+
+
+def main(options, args):
+    if not args or not options.get("rooms"):
+        print("Error: you must supply a rooms CSV file and one or more section pks")
+        return
+    section_list = Section.objects.filter(pk__in=",".join(args).split(","))
+    exam_info = {key: options[key] for key in ["course", "exam", "date", "time"]}
+
+    try:
+        result = prepare_exam(
+            section_list,
+            load_rooms(options["rooms"]),
+            options["output_dir"],
+            exam_info,
+            seats_per_student=options["seats_per_student"],
+            max_letters=options["max_letters"],
+            compile=options["compile"],
+            jobs=options["jobs"],
+        )
+    except InsufficientCapacity as e:
+        print("Error:", e)
+        return
+
+    for room, count, start, stop, student_list in result["assignment"]:
+        print("{}\t{}\t{}\t{}".format(count, start.title(), stop.title(), room))
+    for tex_path, returncode in result["pdf"].items():
+        if returncode != 0:
+            print("[!] pdflatex failed for", tex_path)
+
+
+#######################
@@ -0,0 +1,192 @@
+"""
+Email exam reminders (with room assignments) to the students in good
+standing in the given sections.
+
+Rooms are given either as a single --room, or as a CSV of (room, capacity)
+pairs in the order they should take the alphabet (the same assignment as
+generate_ab_room_assign).  Use --progress to be able to resume an
+interrupted run.
+"""
+
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from classes.models import Section
+from django.template.loader import get_template
+from django.utils.dateparse import parse_datetime
+
+from ..utils.exam_prep import exam_roster, roster_classlist
+from ..utils.exam_rooms import (
+    MAX_LETTERS,
+    SEATS_PER_STUDENT,
+    InsufficientCapacity,
+    assign_rooms,
+    make_blocks,
+)
+from ..utils.mailing import BATCH_SIZE, render_message, send_batched
+from .generate_ab_room_assign import load_rooms
+
+#######################
+
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--class", dest="class", default="", help="Class name, e.g., STAT 1000"
+    ),
+    make_option("--exam", default="", help="Exam name, e.g., Final Exam"),
+    make_option(
+        "--datetime", default="", help="Date and time of the exam: YYYY-MM-DD HH:MM"
+    ),
+    make_option("--room", default="", help="A single room for all students"),
+    make_option(
+        "--rooms",
+        help="Specify a CSV file of (room, capacity) pairs",
+    ),
+    make_option(
+        "--seats-per-student",
+        dest="seats_per_student",
+        type=int,
+        default=SEATS_PER_STUDENT,
+        help="Number of seats for each student (Default: 2)",
+    ),
+    make_option(
+        "--max-letters",
+        dest="max_letters",
+        type=int,
+        default=MAX_LETTERS,
+        help="Number of letters of the family name that define a block "
+        + "of students (Default: 2)",
+    ),
+    make_option("--from", dest="from_email", default=None, help="From address"),
+    make_option(
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Number of messages sent in each batch (Default: {})".format(BATCH_SIZE),
+    ),
+    make_option(
+        "--delay",
+        type=float,
+        default=0,
+        help="Seconds to wait between batches (Default: 0)",
+    ),
+    make_option(
+        "--progress",
+        default=None,
+        help="Progress file: messages recorded there are not sent again",
+    ),
+    make_option(
+        "--dry-run",
+        action="store_true",
+        dest="dry_run",
+        default=False,
+        help="Only show who would receive a reminder, and in which room",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = (
+    "--exam <name> --datetime <dt> (--room <room>|--rooms <csv>) <section_pk> [...]"
+)
+
+SUBJECT_TEMPLATE = "students/email/exam_reminder_subject.txt"
+BODY_TEMPLATE = "students/email/exam_reminder_body.txt"
+
+#######################
+
+
+def room_lookup(roster, options):
+    """
+    Return a dictionary of student number -> room.
+    """
+    if not options.get("rooms"):
+        return {reg.student.student_number: options["room"] for reg in roster}
+    blocks = make_blocks(roster_classlist(roster), options["max_letters"])
+    assignment = assign_rooms(
+        blocks, load_rooms(options["rooms"]), options["seats_per_student"]
+    )
+    return {
+        student_number: room
+        for room, capacity, room_blocks in assignment
+        for prefix, rows in room_blocks
+        for name, student_number, section_name in rows
+    }
+
+
+def unique_students(roster):
+    """
+    The roster, with only the first registration of each student (a
+    student may be registered in more than one of the sections).
+    """
+    seen = set()
+    unique = []
+    for reg in roster:
+        if reg.student_id not in seen:
+            seen.add(reg.student_id)
+            unique.append(reg)
+    return unique
+
+
+def reminders(roster, rooms, context, from_email=None):
+    """
+    Generate the ``(student number, EmailMessage)`` pairs for the roster.
+    """
+    subject_template = get_template(SUBJECT_TEMPLATE)
+    body_template = get_template(BODY_TEMPLATE)
+    for reg in roster:
+        student = reg.student
+        address = reg.preferred_email
+        if address is None:
+            print("[!] No email address for", student, student.student_number)
+            continue
+        context["room"] = rooms[student.student_number]
+        yield student.student_number, render_message(
+            subject_template, body_template, context, address, from_email
+        )
+
+
+def main(options, args):
+    if not args or not (options.get("room") or options.get("rooms")):
+        print(
+            "Error: you must supply a room (or rooms CSV) and one or more section pks"
+        )
+        return
+    dt = parse_datetime(options["datetime"])
+    if dt is None:
+        print("Error: the exam --datetime must be given as YYYY-MM-DD HH:MM")
+        return
+    section_list = Section.objects.filter(pk__in=",".join(args).split(","))
+
+    roster = unique_students(exam_roster(section_list, with_email=True))
+    try:
+        rooms = room_lookup(roster, options)
+    except InsufficientCapacity as e:
+        print("Error:", e)
+        return
+
+    if options["dry_run"]:
+        for reg in roster:
+            student = reg.student
+            print(
+                "{}\t{}\t{}\t{}".format(
+                    student.student_number,
+                    student,
+                    reg.preferred_email or "-",
+                    rooms[student.student_number],
+                )
+            )
+        return
+
+    context = {"class": options["class"], "exam": options["exam"], "dt": dt}
+    sent, skipped = send_batched(
+        reminders(roster, rooms, context, options["from_email"]),
+        batch_size=options["batch_size"],
+        delay=options["delay"],
+        progress_file=options["progress"],
+    )
+    print("Sent {} reminders ({} already sent).".format(sent, skipped))
+
+
+#######################
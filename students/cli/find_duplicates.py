@@ -0,0 +1,87 @@
+"""
+Find duplicate person records, across the whole people table, and show
+a merge plan: for each group of duplicates, the record to keep (first,
+with an empty score) followed by the records to merge into it.
+Nothing is changed.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from ..utils.dedup import MAX_BLOCK, THRESHOLD, find_duplicates, load_people
+from . import OUTPUT_FORMATS, write_rows
+
+#######################
+
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="Minimum score of a duplicate pair (Default: {})".format(THRESHOLD),
+    ),
+    make_option(
+        "--max-block",
+        dest="max_block",
+        type=int,
+        default=MAX_BLOCK,
+        help="Skip candidate blocks larger than this (Default: {})".format(MAX_BLOCK),
+    ),
+    make_option(
+        "--include-inactive",
+        action="store_true",
+        dest="include_inactive",
+        default=False,
+        help="Also consider inactive people",
+    ),
+    make_option(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="tsv",
+        help="Output format: " + ", ".join(OUTPUT_FORMATS) + " (Default: tsv)",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = ""
+
+HEADER = ["group", "person", "name", "score", "reasons"]
+
+#######################
+
+
+def plan_rows(table, plan):
+    """
+    The rows of the merge plan, for output.
+    """
+    label = dict(zip(table.pk.tolist(), table.label))
+    for n, group in enumerate(plan, 1):
+        yield [
+            "{}".format(n),
+            "{}".format(group.survivor),
+            label[group.survivor],
+            "",
+            "",
+        ]
+        for duplicate in group.duplicates:
+            yield [
+                "{}".format(n),
+                "{}".format(duplicate.pk),
+                label[duplicate.pk],
+                "{}".format(duplicate.score),
+                duplicate.reasons,
+            ]
+
+
+def main(options, args):
+    table = load_people(options["include_inactive"])
+    plan = find_duplicates(
+        table, threshold=options["threshold"], max_block=options["max_block"]
+    )
+    header = HEADER if options["output_format"] != "tsv" else None
+    write_rows(plan_rows(table, plan), header, options["output_format"])
+
+
+#######################
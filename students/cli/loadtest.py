@@ -0,0 +1,148 @@
+"""
+Load test the self-registration wizard.
+
+Synthetic sections of the given course (in the current term) and
+synthetic students are created, and every student is run through the
+wizard (register, confirm, and the page which follows) by concurrent
+test clients.  The latency percentiles (in milliseconds), queries per
+request and error rate of each step are reported.
+
+The registration views are protected by the --auth decorator instead
+of the ``registration:auth_decorator`` setting, so that this runs
+without the campus authentication.  The synthetic data is removed
+afterwards (unless --keep).  Use a development database only!
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+import sys
+from optparse import make_option
+
+from classes.models import Course
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from .. import conf
+from ..utils.loadtest import PERCENTILES, PREFIX, cleanup, run_load, seed, summarize
+from . import OUTPUT_FORMATS, write_rows
+
+#######################
+
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option("--course", help="The slug of the course for the synthetic sections"),
+    make_option(
+        "--sections",
+        type=int,
+        default=10,
+        help="Number of synthetic sections (Default: 10)",
+    ),
+    make_option(
+        "--students",
+        type=int,
+        default=100,
+        help="Number of synthetic students (Default: 100)",
+    ),
+    make_option(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Number of concurrent clients (Default: 10)",
+    ),
+    make_option(
+        "--processes",
+        action="store_true",
+        default=False,
+        help="Run the clients in processes, instead of threads",
+    ),
+    make_option(
+        "--auth",
+        default="django.contrib.auth.decorators.login_required",
+        help="Dotted path of the decorator for the registration views "
+        + "(Default: django.contrib.auth.decorators.login_required)",
+    ),
+    make_option("--seed", type=int, default=None, help="Random seed for the data"),
+    make_option(
+        "--prefix",
+        default=PREFIX,
+        help="Prefix of the synthetic usernames and slugs (Default: {})".format(PREFIX),
+    ),
+    make_option(
+        "--keep",
+        action="store_true",
+        default=False,
+        help="Keep the synthetic data",
+    ),
+    make_option(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="tsv",
+        help="Output format: " + ", ".join(OUTPUT_FORMATS) + " (Default: tsv)",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = "--course SLUG"
+
+HEADER = (
+    ["step", "requests", "errors", "error_rate"]
+    + ["p{}".format(p) for p in PERCENTILES]
+    + ["queries", "max_queries"]
+)
+
+#######################
+
+
+def summary_rows(summary):
+    for info in summary:
+        yield [
+            info["step"],
+            "{}".format(info["requests"]),
+            "{}".format(info["errors"]),
+            "{:.3f}".format(info["error_rate"]),
+        ] + ["{:.1f}".format(info["p{}".format(p)]) for p in PERCENTILES] + [
+            "{:.1f}".format(info["queries"]),
+            "{}".format(info["max_queries"]),
+        ]
+
+
+def main(options, args):
+    if not options["course"]:
+        print("Please give the --course for the synthetic sections.")
+        return
+    course = Course.objects.get_by_slug(options["course"])
+    app_settings = dict(conf.get_all())
+    app_settings["registration:auth_decorator"] = options["auth"]
+
+    setup_test_environment()
+    try:
+        with override_settings(**{conf.CONFIG_NAME: app_settings}):
+            try:
+                population = seed(
+                    course,
+                    sections=options["sections"],
+                    students=options["students"],
+                    prefix=options["prefix"],
+                    seed=options["seed"],
+                )
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+            samples = run_load(
+                population,
+                concurrency=options["concurrency"],
+                processes=options["processes"],
+            )
+    finally:
+        if not options["keep"]:
+            cleanup(options["prefix"])
+        teardown_test_environment()
+
+    header = HEADER if options["output_format"] != "tsv" else None
+    write_rows(summary_rows(summarize(samples)), header, options["output_format"])
+
+
+#######################
@@ -0,0 +1,148 @@
+"""
+Check the query count and time budgets of the students application.
+
+A test database is created (in memory, for SQLite), the given fixtures
+(e.g., a dump of the classes and people applications, including the
+current term and an active course) are loaded, and synthetic data is
+added at a realistic scale (see students.tests.fixtures).  Every manager
+method, view and template tag in the budget table
+(students.utils.query_budgets.BUDGETS) is then measured; times are the
+best of several runs.  The same budgets are asserted by the test suite.
+
+Exits with a nonzero status when any check is over its query budget
+(time budgets only give warnings), or when nothing could be checked.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+import sys
+from optparse import make_option
+
+from classes.models import Course
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from .. import conf
+from ..tests.fixtures import build_fixtures, current_course
+from ..utils.query_budgets import REPEAT, run_budgets
+from . import OUTPUT_FORMATS, write_rows
+
+#######################
+
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--course",
+        help="The slug of the course for the synthetic sections "
+        + "(Default: the first active course)",
+    ),
+    make_option(
+        "--sections",
+        type=int,
+        default=20,
+        help="Number of synthetic sections (Default: 20)",
+    ),
+    make_option(
+        "--students",
+        type=int,
+        default=2000,
+        help="Number of synthetic students (Default: 2000)",
+    ),
+    make_option(
+        "--repeat",
+        type=int,
+        default=REPEAT,
+        help="Number of timed runs of each check (Default: {})".format(REPEAT),
+    ),
+    make_option(
+        "--check",
+        action="append",
+        dest="names",
+        default=[],
+        help="Only run this check (may be given more than once)",
+    ),
+    make_option(
+        "--keepdb",
+        action="store_true",
+        default=False,
+        help="Keep the test database",
+    ),
+    make_option(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="tsv",
+        help="Output format: " + ", ".join(OUTPUT_FORMATS) + " (Default: tsv)",
+    ),
+)
+HELP_TEXT = __doc__.strip()
+ARGS_USAGE = "fixture [fixture ...]"
+
+HEADER = ["check", "queries", "max_queries", "ms", "max_ms", "error", "warning"]
+
+#######################
+
+
+def result_rows(results):
+    for result in results:
+        yield [
+            result.name,
+            "{}".format(result.queries),
+            "{}".format(result.max_queries),
+            "{:.1f}".format(result.milliseconds),
+            "{}".format(result.max_ms),
+            result.error or "",
+            result.warning or "",
+        ]
+
+
+def main(options, args):
+    if not args:
+        print("Please give the fixtures to load.", file=sys.stderr)
+        sys.exit(1)
+    app_settings = dict(conf.get_all())
+    # the registration views run without the campus authentication.
+    app_settings["registration:auth_decorator"] = (
+        "django.contrib.auth.decorators.login_required"
+    )
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, keepdb=options["keepdb"])
+    old_config = runner.setup_databases()
+    try:
+        call_command("loaddata", *args, verbosity=0)
+        if options["course"]:
+            course = Course.objects.get_by_slug(options["course"])
+        else:
+            try:
+                course = current_course()
+            except ImproperlyConfigured as e:
+                print(e, file=sys.stderr)
+                sys.exit(1)
+        with override_settings(**{conf.CONFIG_NAME: app_settings}):
+            data = build_fixtures(
+                course, sections=options["sections"], students=options["students"]
+            )
+            results = run_budgets(
+                data, names=options["names"], repeat=options["repeat"]
+            )
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+    header = HEADER if options["output_format"] != "tsv" else None
+    write_rows(result_rows(results), header, options["output_format"])
+    if not results:
+        print("Nothing was checked.", file=sys.stderr)
+        sys.exit(1)
+    if any(result.error for result in results):
+        sys.exit(1)
+
+
+#######################
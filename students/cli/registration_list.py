@@ -5,6 +5,7 @@ Dump the registration list for a section.
 from __future__ import print_function, unicode_literals
 
 from ..models import Student_Registration
+from . import keyset_iterator
 
 #######################
 
@@ -19,6 +20,8 @@ def main(options, args):
     Dump registration list for sections named by primary keys in args.
     """
     for arg in args:
-        registration_list = Student_Registration.objects.filter(section__pk=arg)
-        for reg in registration_list:
-            print(reg.student.student_number)
+        registration_list = Student_Registration.objects.filter(
+            section__pk=arg
+        ).values("pk", "student__student_number")
+        for reg in keyset_iterator(registration_list):
+            print(reg["student__student_number"])
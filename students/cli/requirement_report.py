@@ -1,6 +1,6 @@
 """
 Get a report for a section or group of sections for which students
-have passed or failed a given requirement.
+have passed or failed the given requirements.
 (Only aurora verified students are reported.)
 """
 #######################
@@ -11,13 +11,18 @@ from optparse import make_option
 
 from classes.models import Section
 from django.conf import settings
-from students.models import RequirementCheck, Student_Registration
+from django.core.management.base import CommandError
+from students.managers import requirement_annotation
+from students.models import RequirementCheck
+
+from . import write_rows
 
 DJANGO_COMMAND = "main"
 OPTION_LIST = (
     make_option(
         "--requirement",
-        help="Specify a requirement label "
+        help="Specify a (comma delimited) list of requirement labels "
+        + "(Default: all requirements, without filtering the students). "
         + 'Use the label "?" to get a list of available requirements.',
     ),
     make_option(
@@ -25,7 +30,13 @@ OPTION_LIST = (
         action="store_true",
         default=False,
         help="Instead of showing students that have passed the named "
-        + "requirement, show students that have *failed*",
+        + "requirements, show students that have *failed* any of them",
+    ),
+    make_option(
+        "--csv",
+        action="store_true",
+        default=False,
+        help="Export the report as CSV, with a header row",
     ),
 )
 HELP_TEXT = __doc__.strip()
@@ -48,24 +59,45 @@ def main(options, args):
     # allow any number of args, and each arg could be a comma delimited list:
     section_pk_set = set(",".join(args).split(","))
 
-    if "requirement" not in options or not options["requirement"]:
-        print("You must supply a requirement tag")
-        return
+    if options.get("requirement"):
+        labels = options["requirement"].split(",")
+    else:
+        labels = list(requirements)
 
-    if "?" == options["requirement"] or options["requirement"] not in requirements:
-        if options["requirement"] not in requirements:
-            print("Invalid requirement: %r" % options["requirement"])
+    invalid = [label for label in labels if label not in requirements]
+    if invalid:
+        for label in invalid:
+            if label != "?":
+                print("Invalid requirement: %r" % label)
         print("Available requirement labels: ", end=" ")
         print(", ".join(requirements))
         return
 
     section_list = Section.objects.filter(pk__in=section_pk_set)
-    reg_list = Student_Registration.objects.filter(
-        section__in=section_list, aurora_verified=True
-    ).order_by("section", "student")
-    for reg in reg_list:
-        flag = RequirementCheck.objects.is_complete(reg, options["requirement"])
-        if options["fail"]:
-            flag = not flag  # invert meaning
-        if flag:
-            print(reg.section, "\t", reg.student, "\t", reg.student.student_number)
+    reg_list = (
+        RequirementCheck.objects.matrix(section_list, labels, aurora_verified=True)
+        .for_display()
+        .order_by("section", "student")
+    )
+    names = [requirement_annotation(label) for label in labels]
+    if options["fail"]:
+        # failed any of the named requirements:
+        reg_list = reg_list.exclude(**dict((name, True) for name in names))
+    elif options.get("requirement"):
+        # passed all of the named requirements:
+        reg_list = reg_list.filter(**dict((name, True) for name in names))
+
+    def _rows():
+        for reg in reg_list.iterator():
+            row = [
+                "{}".format(reg.section),
+                "{}".format(reg.student),
+                "{}".format(reg.student.student_number),
+            ]
+            yield row + ["yes" if getattr(reg, name) else "no" for name in names]
+
+    header = ["section", "student", "student_number"] + labels
+    if options["csv"]:
+        write_rows(_rows(), header, "csv")
+    else:
+        write_rows(_rows())
@@ -10,7 +10,8 @@ from optparse import make_option
 
 from classes.models import Section
 from django.conf import settings
-from students.models import RequirementTag, SectionRequirement
+from django.core.management.base import CommandError
+from students.models import SectionRequirement
 
 #######################
 #######################################################################
@@ -39,37 +40,17 @@ ARGS_USAGE = "<course> [course [...]]"
 #######################################################################
 
 
-def do_section(section, req_tags):
+def report(section_list, results):
     """
-    Set requirements for one section.
+    Report the results of assigning requirements to the sections.
     """
-    tags = list(req_tags)
-    # remove iclicker from distance sections
-    if section.section_name.startswith("D") and "i-clicker" in tags:
-        idx = tags.index("i-clicker")
-        tags.pop(idx)
-
-    # setup:
-    section_requirements, created_flag = SectionRequirement.objects.get_or_create(
-        section=section
-    )
-    if not created_flag:
-        print("[!!!]", section, ": not modifying existing requirements")
-        return  # refuse to modify existing requirements!!
-
-    # do it!
-    print(section, ":", end=" ")
-    section_requirements.save()
-    for label in tags:
-        try:
-            tag = RequirementTag.objects.get(active=True, label=label)
-        except RequirementTag.DoesNotExist:
-            print("[!] {0!r} is not a valid requirement tag... skipping".format(label))
-        else:
-            section_requirements.requirements.add(tag)
-            print(label, end=" ")
-    section_requirements.save()
-    print
+    for label in results["invalid_labels"]:
+        print("[!] {0!r} is not a valid requirement tag... skipping".format(label))
+    for section in section_list:
+        if section.pk in results["assigned"]:
+            print(section, ":", " ".join(results["assigned"][section.pk]))
+        elif section.pk in results["existing"]:
+            print("[!!!]", section, ": not modifying existing requirements")
 
 
 #######################################################################
@@ -94,6 +75,7 @@ def main(options, args):
                 "python manage.py students set_section_requirements.py stat-1000 stat-2000"
             )
             print("Note that these sections will be loaded for *next* term.")
+        return
 
     if "reqs" not in options or not options["reqs"]:
         req_tags = [e[0] for e in requirements]
@@ -106,15 +88,16 @@ def main(options, args):
 
     if options["pk"]:
         section_list = Section.objects.filter(pk__in=args)
-        for section in section_list:
-            do_section(section, req_tags)
-
     else:
-        for course_name in args:
-            for section in Section.objects.get_next_term(
-                course__slug__iexact=course_name
-            ):
-                do_section(section, req_tags)
+        section_list = Section.objects.get_next_term(
+            course__slug__in=[course_name.lower() for course_name in args]
+        )
+
+    results = SectionRequirement.objects.assign(section_list, req_tags)
+    report(
+        section_list.select_related("course__department", "instructor", "term"),
+        results,
+    )
 
 
 #######################################################################
@@ -2,7 +2,7 @@
 from __future__ import print_function, unicode_literals
 
 from ..models import Student as Model
-from . import object_detail
+from . import print_object_details
 
 #######################
 #######################################################################
@@ -24,10 +24,7 @@ RELATED_EXCLUDE = []  # any related fields to skip
 
 
 def main(options, args):
-    for pk in args:
-        # get the object
-        obj = Model.objects.get(pk=pk)
-        print(object_detail(obj, M2M_FIELDS, RELATED_ONLY, RELATED_EXCLUDE))
+    print_object_details(Model, args, M2M_FIELDS, RELATED_ONLY, RELATED_EXCLUDE)
 
 
 #######################################################################
@@ -4,18 +4,13 @@ CLI list for Student_Registration objects
 #######################
 from __future__ import print_function, unicode_literals
 
-import codecs
-
-# set unicode piping/output:
-import sys
-
 #######################
 #######################################################################
 #######################################################################
 from optparse import make_option
 
 from ..models import Student_Registration as Model
-from . import resolve_fields
+from . import DEFAULT_CHUNK_SIZE, OUTPUT_FORMATS, stream_listing
 
 HELP_TEXT = __doc__.strip()
 DJANGO_COMMAND = "main"
@@ -24,28 +19,48 @@ OPTION_LIST = (
         "-f",
         "--fields",
         dest="field_list",
-        help="Specify a comma delimited list of fields to include, e.g., -f PROVIDE,EXAMPLE",
+        help="Specify a comma delimited list of fields to include, e.g., -f student.student_number,status",
+    ),
+    make_option(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="tsv",
+        help="Output format: " + ", ".join(OUTPUT_FORMATS) + " (Default: tsv)",
+    ),
+    make_option(
+        "--no-label",
+        action="store_false",
+        dest="label",
+        default=True,
+        help="Omit the string representation of each object.  When the fields "
+        "are all plain model fields, the listing is then fetched as a single "
+        "values() projection.",
+    ),
+    make_option(
+        "--chunk-size",
+        dest="chunk_size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of objects to fetch per query (Default: %d)" % DEFAULT_CHUNK_SIZE,
     ),
 )
 # ARGS_USAGE = '...'
 
 #######################################################################
 
-sys.stdout = codecs.getwriter("utf-8")(sys.stdout)
-
-#######################################################################
-
-#######################################################################
-
 
 def main(options, args):
 
-    qs = Model.objects.filter(active=True)
-    for item in qs:
-        value_list = ["{}".format(item.pk), "{}".format(item)]
-        if options["field_list"]:
-            value_list += resolve_fields(options["field_list"].split(","))
-        print("\t".join(value_list))
+    qs = Model.objects.filter(active=True).for_display()
+    field_list = options["field_list"].split(",") if options["field_list"] else []
+    stream_listing(
+        qs,
+        field_list,
+        output_format=options["output_format"],
+        chunk_size=options["chunk_size"],
+        label=options["label"],
+    )
 
 
 #######################################################################
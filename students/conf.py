@@ -41,11 +41,42 @@ DEFAULT = {
     # Whether or not to use django admin history as well
     #   as student history
     "history:django_admin": True,
+    # Whether assigning requirements to sections in bulk may change the
+    #   requirements of sections which already have requirements.
+    "requirements:modify_existing": False,
+    # Requirements which are never assigned in bulk to some sections,
+    #   as a list of (label, Section lookups) pairs.
+    #   By default, distance sections have no i>clicker requirement.
+    "requirements:exclude": [("i-clicker", {"section_name__startswith": "D"})],
+    # The dotted path of the search backend class (see students.search);
+    #   None chooses one for the database vendor.
+    "search:backend": None,
+    # The dotted path of the decorator which protects the self-registration
+    #   views; it is looked up on each request.
+    "registration:auth_decorator": "uofm.auth.uofm_only",
 }
 
 #########################################################################
 
+from functools import lru_cache
+
 from django.conf import settings
+from django.core.signals import setting_changed
+
+
+@lru_cache(maxsize=None)
+def resolved():
+    """
+    resolved() -> dict
+
+    All of the current settings, resolved once and cached; the cache
+    is cleared whenever the CONFIG_NAME setting changes.
+    Treat the result as read-only.  Code which uses settings in a loop
+    should call this once, and look up its settings (including callables)
+    from the result.
+    """
+    app_settings = getattr(settings, CONFIG_NAME, DEFAULT)
+    return {setting: app_settings.get(setting, DEFAULT[setting]) for setting in DEFAULT}
 
 
 def get(setting):
@@ -56,18 +87,22 @@ def get(setting):
     retrieve.
     """
     assert setting in DEFAULT, "the setting %r has no default value" % setting
-    app_settings = getattr(settings, CONFIG_NAME, DEFAULT)
-    return app_settings.get(setting, DEFAULT[setting])
+    return resolved()[setting]
 
 
 def get_all():
     """
     Return all current settings as a dictionary.
     """
-    app_settings = getattr(settings, CONFIG_NAME, DEFAULT)
-    return dict(
-        [(setting, app_settings.get(setting, DEFAULT[setting])) for setting in DEFAULT]
-    )
+    return dict(resolved())
+
+
+def _setting_changed(setting, **kwargs):
+    if setting == CONFIG_NAME:
+        resolved.cache_clear()
+
+
+setting_changed.connect(_setting_changed)
 
 
 #########################################################################
@@ -4,6 +4,7 @@ from classes.forms import CourseSectionInputWidget
 from classes.models import Section
 from django import forms
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from people.models import EmailAddress, Person
 
 from .models import SectionRequirement, Student, Student_Registration, iclicker
@@ -53,11 +54,18 @@ class StudentForm(forms.Form):
     email = forms.EmailField()
 
     def __init__(self, user, *args, **kwargs):
+        """
+        ``student`` (a keyword argument) is the Student of the user,
+        when it is already known (see ``middleware.get_request_student()``).
+        """
         self.user = user
-        try:
-            self.student = Student.objects.get_from_user(user)
-        except Student.DoesNotExist:
-            self.student = None
+        if "student" in kwargs:
+            self.student = kwargs.pop("student")
+        else:
+            try:
+                self.student = Student.objects.get_from_user(user)
+            except Student.DoesNotExist:
+                self.student = None
 
         if "initial" in kwargs:
             initial = kwargs["initial"]
@@ -120,10 +128,29 @@ class StudentForm(forms.Form):
     def process(self):
         """
         Called when posting and after passing form.is_valid()
+
+        Returns the student; or None (with an error added to the form)
+        when the student number was taken by a concurrent registration.
         """
+        try:
+            with transaction.atomic():
+                student = self._save_student()
+        except IntegrityError:
+            self.add_error("student_number", "Please contact your instructor.")
+            return None
+
+        student.person.add_email(self.cleaned_data["email"], "work", preferred=True)
+        return student
+
+    def _save_student(self):
         if self.student:
-            # update
-            student = self.student
+            # update: lock the student, so that concurrent submissions
+            #   are applied one at a time.
+            student = (
+                Student.objects.select_for_update()
+                .select_related("person")
+                .get(pk=self.student.pk)
+            )
             student_needs_save = False
             if not student.active:
                 student.active = True
@@ -138,14 +165,13 @@ class StudentForm(forms.Form):
             student, created = Student.objects.get_or_create_from_user(
                 self.user, student_number=self.cleaned_data["student_number"]
             )
-            student.History_Update("students.views", "student record created.")
-            student.save()
+            if created:
+                student.History_Update("students.views", "student record created.")
+                student.save()
 
         if not student.person.active:
             student.person.active = True
             student.person.save()
-
-        student.person.add_email(self.cleaned_data["email"], "work", preferred=True)
         return student
 
 
@@ -155,6 +181,8 @@ class StudentForm(forms.Form):
 class ConfirmationForm(forms.Form):
 
     CRN = forms.CharField(max_length=10, label="CRN")
+    # The idempotency token of this confirmation (see views.confirm).
+    token = forms.CharField(widget=forms.HiddenInput, required=False)
 
     def __init__(self, student, section, *args, **kwargs):
         self.student = student
@@ -171,23 +199,42 @@ class ConfirmationForm(forms.Form):
     def process(self):
         """
         process a valid form.
-        is_valid() is assumed True,
-        An existing registration is assumed to not exist.
+        is_valid() is assumed True.
+
+        This is safe to repeat, and to run concurrently: the student row
+        is locked while the registration is created (or reactivated),
+        and history is only written when something changed.
         """
-        reg, flag = Student_Registration.objects.get_or_create(
-            student=self.student, section=self.section, defaults={"status": "BA"}
-        )
-        if not reg.active:
-            reg.active = True
-            reg.save()
-            self.student.History_Update(
-                "students.views", "Self registration reactivated for %s" % self.section
-            )
-        else:
-            self.student.History_Update(
-                "students.views", "Self registration for %s" % self.section
-            )
-        self.student.save()
+        with transaction.atomic():
+            # lock the student row: confirmations run one at a time.
+            Student.objects.select_for_update().get(pk=self.student.pk)
+            try:
+                with transaction.atomic():
+                    reg, created = Student_Registration.objects.get_or_create(
+                        student=self.student,
+                        section=self.section,
+                        defaults={"status": "BA"},
+                    )
+            except IntegrityError:
+                # created by a concurrent request which did not lock first.
+                reg = Student_Registration.objects.get(
+                    student=self.student, section=self.section
+                )
+                created = False
+            if created:
+                self.student.History_Update(
+                    "students.views", "Self registration for %s" % self.section
+                )
+            elif not reg.active:
+                reg.active = True
+                reg.save()
+                self.student.History_Update(
+                    "students.views",
+                    "Self registration reactivated for %s" % self.section,
+                )
+            else:
+                return reg
+            self.student.save()
         return reg
 
 
@@ -431,9 +478,14 @@ class ClasslistUploadForm(forms.Form):
 
         Alternately, a subclass could override the various ``get_``
         methods for the optional fields.
+
+        ``reset_verification`` can be a list of section pks, whose Aurora
+        verification is reset by the upload (see
+        ``update_registrations()``).
         """
         self.override_values = kwargs.pop("override_values", {})
         self.request_user = kwargs.pop("request_user", None)
+        self.reset_verification = kwargs.pop("reset_verification", None)
         return super(ClasslistUploadForm, self).__init__(*args, **kwargs)
 
     def get_clean_value(self, key):
@@ -503,6 +555,7 @@ class ClasslistUploadForm(forms.Form):
             source="classlist",
             commit=commit,
             request_user=self.request_user,
+            reset_verification=self.reset_verification,
         )
         return results.get("invalid_logins", [])
 
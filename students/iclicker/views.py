@@ -16,7 +16,8 @@ from django.views.generic.edit import CreateView, DeleteView, UpdateView
 from django.views.generic.list import ListView
 from people.models import Person
 
-from ..models import Student, iclicker
+from ..middleware import get_request_student
+from ..models import iclicker
 from .forms import iClickerForm
 
 ##
@@ -78,13 +79,14 @@ class ClickerBaseMixin(LmsAuthMixin):
     def _set_lms_person_roles(self, *args, **kwargs):
         """
         Include student information.
+        The student (and their person) come from the request, so the
+        person is only looked up separately for non-students.
         """
-        result = super()._set_lms_person_roles(*args, **kwargs)
-        try:
-            self.student = self.person.student
-        except Student.DoesNotExist:
-            self.student = None
-        return result
+        if not hasattr(self, "student"):
+            self.student = get_request_student(self.request)
+            if self.student is not None:
+                self.person = self.student.person
+        return super()._set_lms_person_roles(*args, **kwargs)
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -34,12 +34,15 @@ def main(args):
 ###############################################################
 from __future__ import print_function, unicode_literals
 
+import ast
 import codecs
+import json
 import locale
 import os
 import sys
 from argparse import RawDescriptionHelpFormatter
 from importlib import import_module
+from importlib.util import find_spec
 
 from django.core.management.base import (
     BaseCommand,
@@ -65,6 +68,196 @@ for i in range(4):
 ###############################################################
 
 
+MANIFEST_VERSION = 2
+MANIFEST_FILENAME = "cli-manifest.json"
+CLI_ATTRIBUTES = [
+    "DJANGO_COMMAND",
+    "USE_ARGPARSE",
+    "OPTION_LIST",
+    "ARGS_USAGE",
+    "HELP_TEXT",
+]
+
+###############################################################
+
+
+def _evaluate(node, docstring):
+    """
+    Statically evaluate the value assigned to a CLI metadata attribute.
+    Literals, ``__doc__``, ``__doc__.strip()`` and string concatenation
+    are understood; anything else evaluates to None.
+    """
+    if node is None:
+        return None
+    if isinstance(node, ast.Name) and node.id == "__doc__":
+        return docstring
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "strip"
+        and not node.args
+    ):
+        value = _evaluate(node.func.value, docstring)
+        return value.strip() if value is not None else None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = _evaluate(node.left, docstring)
+        right = _evaluate(node.right, docstring)
+        if isinstance(left, six.string_types) and isinstance(
+            right, six.string_types
+        ):
+            return left + right
+        return None
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, RecursionError):
+        return None
+
+
+def read_cli_info(filename):
+    """
+    Read the CLI metadata of a script by parsing it (without importing it).
+    Returns a dictionary, or None if the script is not a valid command.
+    """
+    with open(filename, "rb") as f:
+        tree = ast.parse(f.read(), filename)
+    docstring = ast.get_docstring(tree, clean=False)
+    values = {}
+    functions = set()
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            functions.add(node.name)
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in CLI_ATTRIBUTES:
+                    values[target.id] = node.value
+    command = _evaluate(values.get("DJANGO_COMMAND"), docstring)
+    if not command or command not in functions:
+        return None
+    return {
+        "command": command,
+        "args_usage": _evaluate(values.get("ARGS_USAGE"), docstring),
+        "help_text": _evaluate(values.get("HELP_TEXT"), docstring),
+    }
+
+
+###############################################################
+
+
+def _scan_cli_scripts(path, name=None):
+    """
+    Recursively find the scripts (not necessarily valid commands)
+    under path, as (subcommand name, filename) pairs.
+    """
+    if not os.path.exists(os.path.join(path, "__init__.py")):
+        return []
+    listdir = sorted(os.listdir(path))
+    if name is None:
+        name = ""
+    else:
+        name += "."
+    scripts = [
+        (name + os.path.splitext(f)[0], os.path.join(path, f))
+        for f in listdir
+        if f.endswith(".py") and f != "__init__.py"
+    ]
+    for subname in listdir:
+        subpath = os.path.join(path, subname)
+        if os.path.isdir(subpath) and subname != "__pycache__":
+            # recursion!
+            scripts += _scan_cli_scripts(subpath, name + subname)
+    return scripts
+
+
+def _valid_cache(cache):
+    """
+    True if the (loaded) cache is a manifest cache of this version.
+    """
+    if not isinstance(cache, dict) or cache.get("version") != MANIFEST_VERSION:
+        return False
+    scripts = cache.get("scripts")
+    if not isinstance(scripts, dict):
+        return False
+    return all(
+        isinstance(entry, dict)
+        and isinstance(entry.get("stamp"), list)
+        and (entry.get("info") is None or isinstance(entry.get("info"), dict))
+        for entry in scripts.values()
+    )
+
+
+def _read_cli_info_or_report(filename):
+    """
+    ``read_cli_info()``, but a script which cannot be parsed is reported
+    (on stderr) and skipped, rather than breaking every subcommand.
+    """
+    try:
+        return read_cli_info(filename)
+    except (SyntaxError, ValueError, RecursionError) as e:
+        print("Skipping CLI script {}: {}".format(filename, e), file=sys.stderr)
+        return None
+
+
+def load_cli_manifest(path):
+    """
+    Return the manifest of the CLI commands under path: a dictionary
+    mapping subcommand names to their metadata (see ``read_cli_info()``).
+
+    Scripts are parsed, never imported, and the results are cached on
+    disk (in ``__pycache__``); a script is only reparsed when it changes.
+    Scripts which cannot be parsed are skipped.
+    """
+    cache_filename = os.path.join(path, "__pycache__", MANIFEST_FILENAME)
+    try:
+        with open(cache_filename) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        cache = None
+    if not _valid_cache(cache):
+        cache = {"version": MANIFEST_VERSION, "scripts": {}}
+
+    scripts = {}
+    changed = False
+    for subcommand, filename in _scan_cli_scripts(path):
+        stat = os.stat(filename)
+        entry = cache["scripts"].get(subcommand)
+        if entry is None or entry["stamp"] != [stat.st_mtime, stat.st_size]:
+            entry = {
+                "stamp": [stat.st_mtime, stat.st_size],
+                "info": _read_cli_info_or_report(filename),
+            }
+            changed = True
+        scripts[subcommand] = entry
+    if changed or len(scripts) != len(cache["scripts"]):
+        cache["scripts"] = scripts
+        try:
+            if not os.path.isdir(os.path.dirname(cache_filename)):
+                os.makedirs(os.path.dirname(cache_filename))
+            with open(cache_filename, "w") as f:
+                json.dump(cache, f)
+        except (IOError, OSError):
+            pass  # the cache is an optimization only.
+
+    return dict(
+        (subcommand, entry["info"])
+        for subcommand, entry in scripts.items()
+        if entry["info"] is not None
+    )
+
+
+def get_cli_manifest(app_name):
+    """
+    Return the CLI manifest for the given app, or None if the app has
+    no cli module.
+    """
+    spec = find_spec(app_name + ".cli")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return load_cli_manifest(list(spec.submodule_search_locations)[0])
+
+
+###############################################################
+
+
 def is_valid_cli_command(app_name, command_name):
     """
     Validate the given command in the given namespace.
@@ -101,57 +294,26 @@ def get_optional_cli_info(app_name, command_name):
 ###############################################################
 
 
-def discover_cli_scripts(path, name=None):
-    """
-    Recursively discover scripts.
-    """
-    if not os.path.exists(os.path.join(path, "__init__.py")):
-        return []
-    listdir = sorted(os.listdir(path))
-    pyfiles = [
-        os.path.splitext(f)[0]
-        for f in listdir
-        if f.endswith(".py") and f != "__init__.py"
-    ]
-    if name is None:
-        name = ""
-    else:
-        name += "."
-    # this CLI runner script has the same filename as the appname:
-    appname = os.path.splitext(os.path.basename(__file__))[0]
-    scripts = [name + s for s in pyfiles if is_valid_cli_command(appname, name + s)]
-    listpath = [os.path.join(path, f) for f in listdir]
-    sublist = [
-        (subname, subpath)
-        for subname, subpath in zip(listdir, listpath)
-        if os.path.isdir(subpath)
-    ]
-    for subname, subpath in sublist:
-        # recursion!
-        scripts += discover_cli_scripts(subpath, name + subname)
-    return scripts
-
-
-###############################################################
-
-
 def print_available_commands(app_name):
     """
     Prints a list of the available subcommands.
     """
-    mod_name = app_name + ".cli"
     try:
-        mod = import_module(mod_name)
+        manifest = get_cli_manifest(app_name)
     except:
+        manifest = None
+    if manifest is None:
         print("There was an error loading the CLI script module.", file=sys.stderr)
         return
-    path = os.path.dirname(mod.__file__)
-    scripts = discover_cli_scripts(path)
+    width = max([len(s) for s in manifest] + [0])
     print(Command.help)
     print("")
     print("Available CLI scripts are:")
     print("")
-    print("\t" + "\n\t".join(scripts))
+    for subcommand in sorted(manifest):
+        help_text = (manifest[subcommand]["help_text"] or "").strip()
+        summary = help_text.splitlines()[0] if help_text else ""
+        print("\t" + subcommand.ljust(width) + "\t" + summary)
     print("")
 
 
@@ -188,8 +350,12 @@ class Command(BaseCommand):
             return
 
         subcommand = args[0]
-        # check that this is a valid subcommand
-        cli_main = is_valid_cli_command(app_name, subcommand)
+        # check that this is a valid subcommand, without importing any
+        #   of the scripts; only the selected subcommand is imported.
+        manifest = get_cli_manifest(app_name) or {}
+        cli_main = None
+        if subcommand in manifest:
+            cli_main = is_valid_cli_command(app_name, subcommand)
         if cli_main is None:
             print("Error: not a valid subcommand", file=sys.stderr)
             print_available_commands(app_name)
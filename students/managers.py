@@ -3,17 +3,37 @@ Managers for the students application.
 """
 ################################################################
 
+import re
+
 from classes.models import Section, Semester
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
 from people.models import Person
 
-from .querysets import IClickerQuerySet
+from . import conf
+from .querysets import (
+    IClickerQuerySet,
+    RequirementCheckQuerySet,
+    StudentQuerySet,
+    StudentRegistrationQuerySet,
+)
 
 ################################################################
 
 REGISTRATION_GRACE_DAYS = getattr(settings, "REGISTRATION_GRACE_DAYS", 0)
 
+#######################################################################
+
+
+def requirement_annotation(label):
+    """
+    The name of the annotation given to the completion state of the
+    requirement ``label`` by ``RequirementCheck.objects.completion_matrix()``.
+    """
+    return "requirement_" + re.sub(r"\W", "_", label)
+
+
 #######################################################################
 #######################################################################
 #######################################################################
@@ -40,6 +60,11 @@ class CustomQuerySetManager(models.Manager):
 
 
 class StudentManager(CustomQuerySetManager):
+    queryset_class = StudentQuerySet
+
+    def with_email(self):
+        return self.get_queryset().with_email()
+
     def active(self, **kwargs):
         return self.filter(active=True, **kwargs)
 
@@ -60,6 +85,14 @@ class StudentManager(CustomQuerySetManager):
 
 
 class StudentRegistrationManager(CustomQuerySetManager):
+    queryset_class = StudentRegistrationQuerySet
+
+    def for_display(self):
+        return self.get_queryset().for_display()
+
+    def with_email(self):
+        return self.get_queryset().with_email()
+
     def reg_list(self, **kwargs):
         """
         Returns the registrations with the appropriate filters applied from ``**kwargs``.
@@ -220,11 +253,109 @@ class SectionRequirementManager(CustomQuerySetManager):
         """
         return self.get_advertised_sections(requirements__label=label)
 
+    def assign(self, sections, labels, modify_existing=None, exclude=None):
+        """
+        Assign the requirements with the given labels to every section in
+        the ``sections`` queryset, in bulk.
+
+        ``modify_existing`` and ``exclude`` default to the
+        ``requirements:modify_existing`` and ``requirements:exclude``
+        settings: sections which already have requirements are left alone
+        unless ``modify_existing``, and ``exclude`` is a list of
+        ``(label, section_lookups)`` pairs of requirements that are never
+        given to the matching sections.
+
+        Returns a dictionary with the keys:
+            ``assigned``: maps section pks to the labels assigned;
+            ``existing``: the pks of the sections which already had
+                requirements;
+            ``invalid_labels``: labels which are not active requirement tags.
+        """
+        from .models import RequirementTag, SectionRequirement
+
+        if modify_existing is None:
+            modify_existing = conf.get("requirements:modify_existing")
+        if exclude is None:
+            exclude = conf.get("requirements:exclude")
+
+        tag_pks = dict(
+            RequirementTag.objects.filter(active=True, label__in=labels).values_list(
+                "label", "pk"
+            )
+        )
+        invalid_labels = [label for label in labels if label not in tag_pks]
+        labels = [label for label in labels if label in tag_pks]
+
+        section_pks = list(sections.values_list("pk", flat=True))
+        existing = set(
+            self.filter(section__in=section_pks).values_list("section_id", flat=True)
+        )
+        if modify_existing:
+            targets = section_pks
+        else:
+            targets = [pk for pk in section_pks if pk not in existing]
+
+        excluded = {}
+        for label, lookups in exclude:
+            if label in tag_pks and targets:
+                excluded.setdefault(label, set()).update(
+                    sections.filter(pk__in=targets, **lookups).values_list(
+                        "pk", flat=True
+                    )
+                )
+
+        through = SectionRequirement.requirements.through
+        assigned = {}
+        with transaction.atomic():
+            self.bulk_create(
+                [
+                    SectionRequirement(section_id=pk)
+                    for pk in targets
+                    if pk not in existing
+                ]
+            )
+            requirement_pks = dict(
+                self.filter(section__in=targets).values_list("section_id", "pk")
+            )
+            present = set()
+            if modify_existing:
+                present = set(
+                    through.objects.filter(
+                        sectionrequirement__in=requirement_pks.values()
+                    ).values_list("sectionrequirement_id", "requirementtag_id")
+                )
+            rows = []
+            for section_pk in targets:
+                assigned[section_pk] = []
+                for label in labels:
+                    if section_pk in excluded.get(label, ()):
+                        continue
+                    assigned[section_pk].append(label)
+                    key = (requirement_pks[section_pk], tag_pks[label])
+                    if key not in present:
+                        rows.append(
+                            through(
+                                sectionrequirement_id=key[0], requirementtag_id=key[1]
+                            )
+                        )
+            through.objects.bulk_create(rows)
+
+        return {
+            "assigned": assigned,
+            "existing": sorted(existing),
+            "invalid_labels": invalid_labels,
+        }
+
 
 ################################################################
 
 
 class RequirementCheckManager(CustomQuerySetManager):
+    queryset_class = RequirementCheckQuerySet
+
+    def for_display(self):
+        return self.get_queryset().for_display()
+
     def add(self, registration, label):
         """
         Add the given tag to the satisified requirements list.
@@ -253,6 +384,38 @@ class RequirementCheckManager(CustomQuerySetManager):
             > 0
         )
 
+    def completion_matrix(self, registrations, labels):
+        """
+        Annotate the given Student_Registration queryset with the completion
+        state of every requirement in ``labels``: a boolean for each label,
+        named by ``requirement_annotation(label)``.
+
+        The whole matrix is fetched by the one query (an ``EXISTS``
+        subquery per label), rather than a query per registration and label.
+        """
+        for label in labels:
+            checks = self.filter(
+                active=True, registration=OuterRef("pk"), requirements__label=label
+            )
+            registrations = registrations.annotate(
+                **{requirement_annotation(label): Exists(checks)}
+            )
+        return registrations
+
+    def matrix(self, sections, labels, **filters):
+        """
+        Return the requirement matrix for the given sections: their
+        registrations (filtered by ``**filters``) annotated with the
+        completion state of every requirement in ``labels``.
+        See ``completion_matrix()``.
+        """
+        from .models import Student_Registration
+
+        registrations = Student_Registration.objects.filter(
+            section__in=sections, **filters
+        )
+        return self.completion_matrix(registrations, labels)
+
 
 ################################################################
 
@@ -0,0 +1,89 @@
+"""
+Middleware for the students application.
+
+Add ``students.middleware.StudentMiddleware`` to ``MIDDLEWARE`` (after the
+session and authentication middleware) to make ``request.student``
+available.  Application code should call ``get_request_student(request)``,
+which works with or without the middleware (``request.student`` is a lazy
+object, so it is never ``None`` itself).
+"""
+#######################################################################
+from __future__ import print_function, unicode_literals
+
+from django.utils.functional import SimpleLazyObject
+
+from .models import Student
+
+#######################################################################
+
+SESSION_KEY = "students_student_pk"
+
+#######################################################################
+
+
+def _resolve_student(request):
+    """
+    The Student of the request user (with their person), or None.
+    The student pk is remembered in the session, so later requests
+    look the student up by primary key.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    username = user.username.strip()
+    session = getattr(request, "session", None)
+    qs = Student.objects.select_related("person")
+
+    if session is not None and SESSION_KEY in session:
+        # by primary key only: the person (already loaded) is checked here.
+        student = qs.filter(pk=session[SESSION_KEY]).first()
+        if student is not None and student.person.username == username:
+            return student
+        del session[SESSION_KEY]
+    try:
+        student = qs.get(person__username=username)
+    except Student.DoesNotExist:
+        return None
+    if session is not None:
+        session[SESSION_KEY] = student.pk
+    return student
+
+
+def get_request_student(request):
+    """
+    The Student of the request user, or None; resolved at most once
+    per request.
+    """
+    if not hasattr(request, "_cached_student"):
+        request._cached_student = _resolve_student(request)
+    return request._cached_student
+
+
+def set_request_student(request, student):
+    """
+    Record the student of the request user (e.g., once it has been created).
+    """
+    request._cached_student = student
+    session = getattr(request, "session", None)
+    if session is not None:
+        session[SESSION_KEY] = student.pk
+
+
+#######################################################################
+
+
+class StudentMiddleware(object):
+    """
+    Set ``request.student``: the Student of the request user (or None),
+    resolved lazily.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.student = SimpleLazyObject(lambda: get_request_student(request))
+        return self.get_response(request)
+
+
+#######################################################################
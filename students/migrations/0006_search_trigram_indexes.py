@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# (app_label, model_name, column) of the columns searched with contains
+#   lookups by the admin and BaseCustomQuerySet.search().
+TRIGRAM_COLUMNS = [
+    ("people", "Person", "cn"),
+    ("people", "Person", "username"),
+    ("students", "Student", "student_number"),
+    ("students", "iclicker", "iclicker_id"),
+]
+
+
+def _indexes(apps, schema_editor):
+    quote_name = schema_editor.connection.ops.quote_name
+    for app_label, model_name, column in TRIGRAM_COLUMNS:
+        db_table = apps.get_model(app_label, model_name)._meta.db_table
+        name = "students_trgm_{}_{}".format(db_table, column)[:63]
+        yield quote_name(name), quote_name(db_table), quote_name(column)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    GIN trigram indexes on UPPER(column::text), which is what Django
+    generates for icontains/istartswith on PostgreSQL.
+    Other databases are left alone.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, db_table, column in _indexes(apps, schema_editor):
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS {} ON {} USING gin "
+            "(UPPER({}::text) gin_trgm_ops)".format(name, db_table, column)
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, db_table, column in _indexes(apps, schema_editor):
+        schema_editor.execute("DROP INDEX IF EXISTS {}".format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("people", "0001_initial"),
+        ("students", "0005_auto_20170602_1055"),
+    ]
+
+    operations = [migrations.RunPython(create_trigram_indexes, drop_trigram_indexes)]
@@ -6,11 +6,13 @@ from __future__ import print_function, unicode_literals
 
 from .cbv_admin import AdminSiteViewMixin, ClassBasedViewsAdminMixin
 from .default_filter_admin import DefaultFilterMixin
+from .large_table_admin import EstimatedCountAdminMixin, EstimatedCountPaginator
 from .restricted_forms import (
     RestrictedAdminMixin,
     RestrictedFormViewMixin,
     RestrictedQuerysetMixin,
 )
+from .search_admin import SearchBackendAdminMixin
 from .single_fk import SingleFKAdminMixin, SingleFKFormViewMixin
 
 #######################
@@ -20,9 +22,12 @@ __all__ = [
     "ClassBasedViewsAdminMixin",
     "AdminSiteViewMixin",
     "DefaultFilterMixin",
+    "EstimatedCountAdminMixin",
+    "EstimatedCountPaginator",
     "RestrictedAdminMixin",
     "RestrictedFormViewMixin",
     "RestrictedQuerysetMixin",
+    "SearchBackendAdminMixin",
     "SingleFKAdminMixin",
     "SingleFKFormViewMixin",
 ]
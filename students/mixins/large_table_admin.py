@@ -0,0 +1,113 @@
+"""
+Changelists for large tables: estimated counts and capped exact counts.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+import json
+
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections, transaction
+from django.utils.functional import cached_property
+
+#######################
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    On PostgreSQL:
+    * unfiltered counts are the planner's estimate of the table size
+      (``pg_class.reltuples``), for tables with at least
+      ``estimate_threshold`` rows;
+    * other counts are exact, unless they take longer than
+      ``count_timeout`` milliseconds, in which case the estimate from
+      ``EXPLAIN`` is used.
+    Other databases always get exact counts.
+    """
+
+    count_timeout = 200
+    estimate_threshold = 10000
+
+    def __init__(self, *args, **kwargs):
+        count_timeout = kwargs.pop("count_timeout", None)
+        if count_timeout is not None:
+            self.count_timeout = count_timeout
+        super(EstimatedCountPaginator, self).__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not hasattr(qs, "query"):
+            return len(qs)
+        connection = connections[qs.db]
+        if connection.vendor != "postgresql":
+            return qs.count()
+        if not qs.query.where:
+            estimate = self._table_estimate(connection, qs.model._meta.db_table)
+            if estimate >= self.estimate_threshold:
+                return estimate
+        try:
+            with transaction.atomic(using=qs.db):
+                with connection.cursor() as cursor:
+                    cursor.execute("SHOW statement_timeout")
+                    previous = cursor.fetchone()[0]
+                    cursor.execute(
+                        "SET LOCAL statement_timeout = %s", [int(self.count_timeout)]
+                    )
+                count = qs.count()
+                # SET LOCAL lasts until the outermost transaction ends
+                #   (e.g., with ATOMIC_REQUESTS): restore the previous value.
+                #   When the count times out, rolling back the savepoint
+                #   restores it.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = %s", [previous])
+                return count
+        except OperationalError:
+            return self._explain_estimate(connection, qs)
+
+    def _table_estimate(self, connection, db_table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(db_table)],
+            )
+            row = cursor.fetchone()
+        return row[0] if row is not None else 0
+
+    def _explain_estimate(self, connection, qs):
+        sql, params = qs.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        if not isinstance(plan, list):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]["Plan Rows"]
+
+
+#######################
+
+
+class EstimatedCountAdminMixin(object):
+    """
+    Use the ``EstimatedCountPaginator`` for the changelist, and skip the
+    full (unfiltered) result count.  The changelist count is an estimate
+    for very large tables or slow queries.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    count_timeout = EstimatedCountPaginator.count_timeout
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        return self.paginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            count_timeout=self.count_timeout,
+        )
+
+
+#######################
@@ -0,0 +1,27 @@
+"""
+Admin search through the students search backend.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+from ..search import get_search_backend, search_terms
+
+#######################
+
+
+class SearchBackendAdminMixin(object):
+    """
+    Make the changelist search use the search backend (see
+    ``students.search``), the same as ``BaseCustomQuerySet.search()``.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        terms = search_terms(search_term)
+        if not search_fields or not terms:
+            return queryset, False
+        backend = get_search_backend(queryset.db)
+        return backend.search(queryset, search_fields, terms)
+
+
+#######################
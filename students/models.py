@@ -96,7 +96,11 @@ class Student(StudentsBaseModel):
     def get_email_address(self):
         """
         Caution: this will retrieve non-public email addresses.
+        When the student comes from ``Student.objects.with_email()``
+        no query is made.
         """
+        if hasattr(self, "preferred_email"):
+            return self.preferred_email
         qs = self.person.emailaddress_set.filter(active=True)
 
         info = list(qs)  # force evalutation: 1 query.
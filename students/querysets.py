@@ -5,13 +5,13 @@ QuerySets for the students application.
 #######################
 from __future__ import print_function, unicode_literals
 
-import operator
-
 #######################
-from functools import reduce
-
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from people.models import EmailAddress
+
+from .search import get_search_backend
 
 #######################################################################
 #######################################################################
@@ -35,6 +35,7 @@ class BaseCustomQuerySet(models.query.QuerySet):
         This is heavily modelled after the way the Django Admin handles
         search queries.
         See: django.contrib.admin.views.main.py:ChangeList.get_queryset
+        The lookups are made by the search backend (see students.search).
         """
         if not hasattr(self, "search_fields"):
             raise ImproperlyConfigured(
@@ -49,26 +50,29 @@ class BaseCustomQuerySet(models.query.QuerySet):
         if len(terms) == 1:
             terms = terms[0].split()
 
-        def construct_search(field_name):
-            if field_name.startswith("^"):
-                return "%s__istartswith" % field_name[1:]
-            elif field_name.startswith("="):
-                return "%s__iexact" % field_name[1:]
-            elif field_name.startswith("@"):
-                return "%s__search" % field_name[1:]
-            else:
-                return "%s__icontains" % field_name
+        backend = get_search_backend(self.db)
+        qs, needs_distinct = backend.search(
+            self.filter(active=True), self.search_fields, terms
+        )
+        if needs_distinct:
+            qs = qs.distinct()
+        return qs
+
+
+#######################################################################
 
-        qs = self.filter(active=True)
-        orm_lookups = [
-            construct_search("{}".format(search_field))
-            for search_field in self.search_fields
-        ]
-        for bit in terms:
-            or_queries = [models.Q(**{orm_lookup: bit}) for orm_lookup in orm_lookups]
-            qs = qs.filter(reduce(operator.or_, or_queries))
 
-        return qs.distinct()
+def preferred_email(person_ref):
+    """
+    A subquery for the preferred active email address of the person
+    referred to by ``person_ref`` (e.g., ``"person"`` or ``"student__person"``).
+    The preferred address wins; otherwise the first one added.
+    """
+    return Subquery(
+        EmailAddress.objects.filter(person=OuterRef(person_ref), active=True)
+        .order_by("-preferred", "pk")
+        .values("address")[:1]
+    )
 
 
 #######################################################################
@@ -76,6 +80,61 @@ class BaseCustomQuerySet(models.query.QuerySet):
 #######################################################################
 
 
+class StudentQuerySet(BaseCustomQuerySet):
+    def with_email(self):
+        """
+        Annotate each student with their ``preferred_email``
+        (``None`` when they have no active address).
+        """
+        return self.annotate(preferred_email=preferred_email("person"))
+
+
+#######################################################################
+
+
+# The relations used by the string representation of a registration
+#   (the student, and the section with everything its label shows).
+REGISTRATION_DISPLAY_RELATED = [
+    "student__person",
+    "section__course__department",
+    "section__instructor",
+    "section__term",
+]
+
+
+class StudentRegistrationQuerySet(BaseCustomQuerySet):
+    def for_display(self):
+        """
+        Join everything needed to render the registrations as strings,
+        so that ``str(registration)`` never makes a query.
+        """
+        return self.select_related(*REGISTRATION_DISPLAY_RELATED)
+
+    def with_email(self):
+        """
+        Annotate each registration with the ``preferred_email``
+        of the student (``None`` when they have no active address).
+        """
+        return self.annotate(preferred_email=preferred_email("student__person"))
+
+
+#######################################################################
+
+
+class RequirementCheckQuerySet(BaseCustomQuerySet):
+    def for_display(self):
+        """
+        Join everything needed to render the requirement checks
+        (and their registrations) as strings.
+        """
+        return self.select_related(
+            *["registration__" + related for related in REGISTRATION_DISPLAY_RELATED]
+        )
+
+
+#######################################################################
+
+
 class IClickerQuerySet(BaseCustomQuerySet):
     """
     Provide a custom model API.  Urls, views, etc. should only
@@ -84,5 +143,11 @@ class IClickerQuerySet(BaseCustomQuerySet):
 
     search_fields = ["iclicker_id", "student__student_number", "student__person__cn"]
 
+    def for_display(self):
+        """
+        Join what is needed to render the i>clickers as strings.
+        """
+        return self.select_related("student__person")
+
 
 #######################################################################
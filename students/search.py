@@ -0,0 +1,123 @@
+"""
+Search backends for the students application.
+
+``BaseCustomQuerySet.search()``, the admin (through
+``mixins.SearchBackendAdminMixin``) and the search CLIs all go through
+the backend chosen by the ``search:backend`` setting.
+
+Search fields are given in the same way as for the Django admin:
+``^field`` (starts with), ``=field`` (exact), ``@field`` (full text search)
+or ``field`` (contains).
+"""
+#######################################################################
+from __future__ import print_function, unicode_literals
+
+import operator
+from functools import lru_cache, reduce
+
+from django.apps import apps
+from django.contrib.admin.utils import lookup_needs_distinct
+from django.db import connections, models
+from django.utils.module_loading import import_string
+from django.utils.text import smart_split, unescape_string_literal
+
+from . import conf
+
+#######################################################################
+
+
+def search_terms(search_string):
+    """
+    Split a search string into terms; quoted phrases are a single term.
+    """
+    terms = []
+    for bit in smart_split(search_string):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        terms.append(bit)
+    return terms
+
+
+#######################################################################
+
+
+class SearchBackend(object):
+    """
+    The portable search backend: case insensitive ``LIKE`` lookups, as in
+    the Django admin.  Full text (``@``) fields are treated as contains.
+
+    On PostgreSQL the ``pg_trgm`` indexes created by the migrations serve
+    the contains lookups on the most searched columns.
+    """
+
+    def construct_search(self, field_name):
+        if field_name.startswith("^"):
+            return "%s__istartswith" % field_name[1:]
+        elif field_name.startswith("="):
+            return "%s__iexact" % field_name[1:]
+        elif field_name.startswith("@"):
+            return "%s__icontains" % field_name[1:]
+        else:
+            return "%s__icontains" % field_name
+
+    def search(self, queryset, search_fields, terms):
+        """
+        Returns ``(queryset, needs_distinct)``: every term must match
+        at least one of the search fields.
+        ``needs_distinct`` is only True when a search field spans a
+        to-many relation (so that rows may be duplicated).
+        """
+        orm_lookups = [
+            self.construct_search("{}".format(search_field))
+            for search_field in search_fields
+        ]
+        if not orm_lookups or not terms:
+            return queryset, False
+        for bit in terms:
+            or_queries = [models.Q(**{orm_lookup: bit}) for orm_lookup in orm_lookups]
+            queryset = queryset.filter(reduce(operator.or_, or_queries))
+        opts = queryset.model._meta
+        needs_distinct = any(
+            lookup_needs_distinct(opts, orm_lookup) for orm_lookup in orm_lookups
+        )
+        return queryset, needs_distinct
+
+
+#######################################################################
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """
+    PostgreSQL: full text (``@``) fields use the ``search`` lookup
+    (``to_tsvector @@ plainto_tsquery``); this requires
+    ``django.contrib.postgres`` in ``INSTALLED_APPS``.
+    Other lookups are as for the portable backend, and use the
+    trigram indexes.
+    """
+
+    def construct_search(self, field_name):
+        if field_name.startswith("@") and apps.is_installed("django.contrib.postgres"):
+            return "%s__search" % field_name[1:]
+        return super(PostgreSQLSearchBackend, self).construct_search(field_name)
+
+
+#######################################################################
+
+VENDOR_BACKENDS = {"postgresql": PostgreSQLSearchBackend}
+
+
+@lru_cache(maxsize=None)
+def _backend(backend_path, vendor):
+    if backend_path is not None:
+        return import_string(backend_path)()
+    return VENDOR_BACKENDS.get(vendor, SearchBackend)()
+
+
+def get_search_backend(using="default"):
+    """
+    The search backend instance for the given database alias.
+    """
+    return _backend(conf.get("search:backend"), connections[using].vendor)
+
+
+#######################################################################
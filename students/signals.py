@@ -0,0 +1,38 @@
+"""
+Signal handlers for the students application.
+"""
+#########################################################################
+from __future__ import print_function, unicode_literals
+
+from django.core.cache import cache
+
+#########################################################################
+
+
+def _generation_key(model):
+    return "students:generation:{}".format(model._meta.label_lower)
+
+
+def get_generation(model):
+    """
+    The modification generation of the model's table: a counter which
+    changes whenever an instance is saved or deleted.  Use it in cache
+    keys for data derived from the table.
+    (Bulk updates do not send signals, so such caches should also have
+    a short timeout.)
+    """
+    return cache.get_or_set(_generation_key(model), 0, None)
+
+
+def bump_generation(sender, **kwargs):
+    """
+    post_save and post_delete receiver; see ``get_generation()``.
+    """
+    key = _generation_key(sender)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+#########################################################################
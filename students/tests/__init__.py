@@ -0,0 +1,25 @@
+"""
+Tests for the students application.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+from .. import conf
+
+#######################
+
+
+def offline_settings(**changes):
+    """
+    The application settings for tests: the registration views run
+    without the campus authentication.
+    """
+    app_settings = dict(conf.get_all())
+    app_settings["registration:auth_decorator"] = (
+        "django.contrib.auth.decorators.login_required"
+    )
+    app_settings.update(changes)
+    return {conf.CONFIG_NAME: app_settings}
+
+
+#######################
@@ -0,0 +1,160 @@
+"""
+Data at a realistic scale for the tests (and the query budgets).
+
+The classes and people applications come from the fixtures named by the
+``STUDENTS_TEST_FIXTURES`` setting (e.g., a dump of a development
+database, including a current term and an active course); the students,
+their registrations and requirements are generated.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+from collections import namedtuple
+
+from classes.models import Course, Section
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client
+from people.models import Person
+
+from ..models import (
+    RequirementCheck,
+    RequirementTag,
+    SectionRequirement,
+    Student,
+    Student_Registration,
+    iclicker,
+)
+from ..utils import loadtest
+from ..utils.query_budgets import LABEL
+from ..views import ALL_REQUIREMENTS
+
+#######################
+
+FIXTURES = getattr(settings, "STUDENTS_TEST_FIXTURES", [])
+
+Fixtures = namedtuple(
+    "Fixtures",
+    ["sections", "user", "registration", "iclicker", "client", "admin_client"],
+)
+
+#######################
+
+
+def current_course():
+    """
+    The first active course of the loaded fixtures.
+    """
+    course = Course.objects.filter(active=True).order_by("pk").first()
+    if course is None:
+        raise ImproperlyConfigured(
+            "The STUDENTS_TEST_FIXTURES must include an active course."
+        )
+    return course
+
+
+def build_fixtures(
+    course, sections=20, students=2000, prefix=loadtest.PREFIX, seed=None
+):
+    """
+    Create the synthetic sections and students (see ``loadtest.seed()``),
+    with a registration and an i>clicker for every student, the
+    requirements of the settings for every section, and completed
+    requirement checks for half of the registrations.
+    Returns the ``Fixtures``: the logged in ``client`` is a registered
+    student, and ``admin_client`` a superuser.
+    """
+    User = get_user_model()
+    population = loadtest.seed(course, sections, students, prefix, seed)
+    users = User.objects.filter(username__startswith=prefix).in_bulk(
+        field_name="username"
+    )
+    Student.objects.bulk_create(
+        [
+            Student(
+                person=Person.objects.get_or_create_from_user(users[s.username])[0],
+                student_number=int(s.student_number),
+            )
+            for s in population
+        ],
+        batch_size=500,
+    )
+    student_list = Student.objects.filter(person__username__startswith=prefix).in_bulk(
+        field_name="student_number"
+    )
+    Student_Registration.objects.bulk_create(
+        [
+            Student_Registration(
+                student=student_list[int(s.student_number)],
+                section_id=s.section_pk,
+                status="BA",
+            )
+            for s in population
+        ],
+        batch_size=500,
+    )
+    iclicker.objects.bulk_create(
+        [
+            iclicker(student=student, iclicker_id="{:08X}".format(student.pk))
+            for student in student_list.values()
+        ],
+        batch_size=500,
+    )
+
+    section_pks = sorted(set(s.section_pk for s in population))
+    # the budgeted requirement checks need LABEL, even without settings.
+    tags = [
+        RequirementTag.objects.get_or_create(label=label)[0]
+        for label in sorted(set(ALL_REQUIREMENTS) | {LABEL})
+    ]
+    for requirement in SectionRequirement.objects.filter(section__in=section_pks):
+        requirement.requirements.add(*tags)
+    registrations = Student_Registration.objects.filter(
+        section__in=section_pks
+    ).order_by("pk")
+    RequirementCheck.objects.bulk_create(
+        [
+            RequirementCheck(registration_id=pk)
+            for pk in list(registrations.values_list("pk", flat=True))[::2]
+        ],
+        batch_size=500,
+    )
+    Through = RequirementCheck.requirements.through
+    Through.objects.bulk_create(
+        [
+            Through(requirementcheck_id=check_pk, requirementtag_id=tag.pk)
+            for check_pk in RequirementCheck.objects.filter(
+                registration__in=registrations
+            ).values_list("pk", flat=True)
+            for tag in tags
+        ],
+        batch_size=500,
+    )
+
+    registration = registrations.select_related("student__person", "section")[0]
+    user = users[registration.student.person.username]
+    client = Client()
+    client.force_login(user)
+    session = client.session
+    session["student_pk"] = registration.student_id
+    session["section_pk"] = registration.section_id
+    session.save()
+
+    admin_user = User.objects.create_superuser(
+        prefix + "admin", prefix + "admin@example.com", None
+    )
+    admin_client = Client()
+    admin_client.force_login(admin_user)
+
+    return Fixtures(
+        sections=list(Section.objects.filter(pk__in=section_pks)),
+        user=user,
+        registration=registration,
+        iclicker=iclicker.objects.get(student=registration.student),
+        client=client,
+        admin_client=admin_client,
+    )
+
+
+#######################
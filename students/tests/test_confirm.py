@@ -0,0 +1,93 @@
+"""
+Concurrent confirmations of the same registration.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from classes.models import Section
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    Client,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.urls import reverse
+from people.models import Person
+
+from ..models import History, Student, Student_Registration
+from ..utils import loadtest
+from ..views import CONFIRM_TOKEN_KEY
+from . import offline_settings
+from .fixtures import FIXTURES, current_course
+
+#######################
+
+CONCURRENCY = 8
+
+
+@unittest.skipUnless(FIXTURES, "STUDENTS_TEST_FIXTURES is not set")
+@override_settings(**offline_settings())
+class ConcurrentConfirmTests(TransactionTestCase):
+    fixtures = FIXTURES
+
+    def setUp(self):
+        population = loadtest.seed(current_course(), sections=1, students=1)
+        self.user = get_user_model().objects.get(username=population[0].username)
+        person = Person.objects.get_or_create_from_user(self.user)[0]
+        self.student = Student.objects.create(
+            person=person, student_number=int(population[0].student_number)
+        )
+        self.section_pk = population[0].section_pk
+
+        # one session, as when a student double clicks (or reloads).
+        client = Client()
+        client.force_login(self.user)
+        session = client.session
+        session["student_pk"] = self.student.pk
+        session["section_pk"] = self.section_pk
+        session[CONFIRM_TOKEN_KEY] = self.token = "0" * 32
+        session.save()
+        self.session_key = session.session_key
+
+    def _confirm(self, crn):
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = self.session_key
+        try:
+            return client.post(
+                reverse("students-register-confirm"),
+                {"CRN": crn, "token": self.token},
+            ).status_code
+        finally:
+            # each thread has its own connection.
+            connection.close()
+
+    # SQLite has no row locks, and rejects concurrent writes.
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_parallel_confirmations(self):
+        crn = Section.objects.get(pk=self.section_pk).crn
+        with ThreadPoolExecutor(CONCURRENCY) as executor:
+            status_codes = list(executor.map(self._confirm, [crn] * CONCURRENCY))
+        # every submission goes on to the next step.
+        self.assertEqual(status_codes, [302] * CONCURRENCY)
+        self.assertEqual(
+            Student_Registration.objects.filter(
+                student=self.student, section=self.section_pk
+            ).count(),
+            1,
+        )
+        # and the registration is recorded once.
+        self.assertEqual(
+            History.objects.filter(
+                student=self.student, message__startswith="Self registration for"
+            ).count(),
+            1,
+        )
+
+
+#######################
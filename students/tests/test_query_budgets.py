@@ -0,0 +1,50 @@
+"""
+Query count budgets: every check in
+``students.utils.query_budgets.BUDGETS`` must stay within its budget.
+(Time budgets vary with the machine, and are left to the CLI.)
+Needs the ``STUDENTS_TEST_FIXTURES`` (see ``students.tests.fixtures``).
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+import unittest
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..utils.query_budgets import BUDGETS, CHECKS, EXEMPT
+from . import offline_settings
+from .fixtures import FIXTURES, build_fixtures, current_course
+
+#######################
+
+
+@unittest.skipUnless(FIXTURES, "STUDENTS_TEST_FIXTURES is not set")
+@override_settings(**offline_settings())
+class QueryBudgetTests(TestCase):
+    fixtures = FIXTURES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixtures(current_course(), sections=10, students=500)
+
+    def test_every_check_has_a_budget(self):
+        self.assertEqual(set(CHECKS), set(BUDGETS))
+        self.assertFalse(set(CHECKS) & set(EXEMPT))
+
+    def test_query_budgets(self):
+        for name, budget in sorted(BUDGETS.items()):
+            with self.subTest(name):
+                check = CHECKS[name]
+                check(self.data)  # warm up any caches.
+                with CaptureQueriesContext(connection) as queries:
+                    check(self.data)
+                self.assertLessEqual(
+                    len(queries),
+                    budget.queries,
+                    "\n".join(query["sql"] for query in queries),
+                )
+
+
+#######################
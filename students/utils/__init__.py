@@ -2,6 +2,26 @@ from django.contrib.admin.models import ADDITION, CHANGE, LogEntry
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 
+from .. import conf
+
+
+def _get_user_id(user):
+    if user is None:
+        # Best choice -- AnonymousUser installed by django-guardian
+        try:
+            user = User.objects.get(username="AnonymousUser")
+        except User.DoesNotExist:
+            pass
+    if user is None:
+        # Second best choice (poor choice)
+        #   -- Lowest PK superuser
+        user_id = min(
+            User.objects.filter(is_superuser=True).values_list("id", flat=True)
+        )
+    else:
+        user_id = user.pk
+    return user_id
+
 
 def admin_history(object, message, action_flag, user):
     def _guess_action_flag(msg):
@@ -15,23 +35,6 @@ def admin_history(object, message, action_flag, user):
             action_flag = CHANGE
         return action_flag
 
-    def _get_user_id(user):
-        if user is None:
-            # Best choice -- AnonymousUser installed by django-guardian
-            try:
-                user = User.objects.get(username="AnonymousUser")
-            except User.DoesNotExist:
-                pass
-        if user is None:
-            # Second best choice (poor choice)
-            #   -- Lowest PK superuser
-            user_id = min(
-                User.objects.filter(is_superuser=True).values_list("id", flat=True)
-            )
-        else:
-            user_id = user.pk
-        return user_id
-
     # admin_history begins
 
     user_id = _get_user_id(user)
@@ -46,3 +49,40 @@ def admin_history(object, message, action_flag, user):
         action_flag=action_flag,
         change_message=message,
     )
+
+
+def bulk_history(objects, tag, info, user=None, action_flag=CHANGE):
+    """
+    The bulk equivalent of ``Student.History_Update(tag, info, subobj=object)``
+    for a list of objects related to students (each with a ``student_id``):
+    one History row per object, and (when the ``history:django_admin``
+    setting is on) one admin LogEntry per object, each with a single
+    bulk insert.
+    """
+    from ..models import History
+
+    if not objects:
+        return
+    History.objects.bulk_create(
+        [
+            History(student_id=o.student_id, annotation=tag, message=info)
+            for o in objects
+        ]
+    )
+    if conf.get("history:django_admin"):
+        user_id = _get_user_id(user)
+        content_type_id = ContentType.objects.get_for_model(objects[0]).pk
+        message = "{} [/{}]".format(info, tag)
+        LogEntry.objects.bulk_create(
+            [
+                LogEntry(
+                    user_id=user_id,
+                    content_type_id=content_type_id,
+                    object_id="{}".format(o.pk),
+                    object_repr="{}".format(o)[:200],
+                    action_flag=action_flag,
+                    change_message=message,
+                )
+                for o in objects
+            ]
+        )
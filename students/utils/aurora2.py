@@ -12,9 +12,10 @@ from io import StringIO
 from pprint import pprint
 
 from classes.models import Course, Section, Semester
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.template.defaultfilters import slugify
 from django.utils.encoding import force_text
+from django.utils.timezone import now
 from people.models import EmailAddress, Person
 from spreadsheet import SUPPORTED_FORMATS, sheetReader
 
@@ -302,12 +303,15 @@ def _history_bulk_create(student_list, message, annotation="aurora_filter"):
 ################################################################
 
 
-def _get_username(email):
+def _get_username(email, app_settings=None):
     """
     Extract usernames from email addresses.
     NB: going forward, user@myumanitoba.ca *may* be username!
+    ``app_settings`` is a ``conf.resolved()`` snapshot, if the caller has one.
     """
-    f = conf.get("aurora:student_username")
+    if app_settings is None:
+        app_settings = conf.resolved()
+    f = app_settings["aurora:student_username"]
     if f is not None:
         return f(email)
     return None
@@ -316,7 +320,9 @@ def _get_username(email):
 ################################################################
 
 
-def get_or_create_student(rec, section, require_valid_login, request_user):
+def get_or_create_student(
+    rec, section, require_valid_login, request_user, app_settings=None
+):
     """
     section is only for information purposes.
 
@@ -329,9 +335,16 @@ def get_or_create_student(rec, section, require_valid_login, request_user):
     If ``require_valid_login`` is ``True``, then only valid logins
     will get created.  Student with invalid usernames will raise
     ``InvalidUsername`` exception
+
+    ``app_settings`` is a ``conf.resolved()`` snapshot; importers should
+    resolve the settings once and pass them in for every record.
     """
+    if app_settings is None:
+        app_settings = conf.resolved()
+    email_type_slug = app_settings["aurora:email_type_slug"]
+
     # Check to see if it's possible to have valid usernames...
-    if conf.get("aurora:student_username") is None:
+    if app_settings["aurora:student_username"] is None:
         require_valid_login = False
 
     def _get_core_info(rec):
@@ -349,7 +362,7 @@ def get_or_create_student(rec, section, require_valid_login, request_user):
         def _get_or_create_person(name, username, email):
             def _add_email(person, created, email):
                 if email is not None and email.strip() and "@" in email:
-                    type_slug = conf.get("aurora:email_type_slug")(email)
+                    type_slug = email_type_slug(email)
                     if created:
                         person.add_email(email, type_slug, preferred=True)
                     else:
@@ -596,7 +609,7 @@ def get_or_create_student(rec, section, require_valid_login, request_user):
         print("st_num = {0!r}".format(st_num))
         print("email = {0!r}".format(email))
         print("name = {0!r}".format(name))
-    username = _get_username(email)
+    username = _get_username(email, app_settings)
     if debug:
         print("username = {0!r}".format(username))
     student = _get_or_create_student(st_num, name, username, email, require_valid_login)
@@ -631,9 +644,9 @@ def update_or_create_registration(
     section, student, status, require_valid_login, request_user
 ):
     try:
-        reg = Student_Registration.objects.select_related(
-            "student", "student__person"
-        ).get(student=student, section=section)
+        reg = Student_Registration.objects.for_display().get(
+            student=student, section=section
+        )
         # do not clobber existing registration status
     except Student_Registration.DoesNotExist:
         reg = Student_Registration(student=student, section=section, status=status)
@@ -772,6 +785,7 @@ def _dict_queryset_delta(old_qs, new_dict, key_field):
 ################################################################
 
 
+@transaction.atomic
 def update_registrations(
     fileobj,
     section=None,
@@ -782,18 +796,26 @@ def update_registrations(
     commit=True,
     source=None,
     request_user=None,
+    reset_verification=None,
 ):
     """
     Update Registrations based on the Aurora CSV file given.
     ``valid_status``, if given, must be a list of valid "Reg Status" values;
     use an empty list for any status.
 
+    ``reset_verification``, if given, is a list of section pks: the Aurora
+    verification of their registrations (in the sections of this file) is
+    cleared first (with history), so that only the registrations in the
+    file are verified.  Everything is updated in one transaction.
+
     ``source = "classlist"`` is equivalent to ``source = None``
     ``source = "report"`` is also valid.
     """
+    app_settings = conf.resolved()  # once, for every record.
+
     # Cross check to see if parameters make sense with configuration.
     #   - if we cannot have usernames, do the right thing.
-    if conf.get("aurora:student_username") is None:
+    if app_settings["aurora:student_username"] is None:
         return_invalid_logins = False
         require_value_login = False
 
@@ -857,12 +879,27 @@ def update_registrations(
     if return_invalid_logins:
         invalid_logins = []
 
+    if reset_verification:
+        reset_qs = Student_Registration.objects.filter(
+            active=True,
+            aurora_verified=True,
+            section__in=aurora_section_qs.filter(pk__in=reset_verification),
+        )
+        reset_list = list(reset_qs.for_display())
+        reset_qs.update(modified=now(), aurora_verified=False)
+        utils.bulk_history(
+            reset_list,
+            "aurora2.update_registrations",
+            "Aurora verification reset, to re-run the Aurora check",
+            user=request_user,
+        )
+
     valid_student_numbers = []
     # sections agree, proceed
 
     id_list = [rec["ID"] for rec in a_students]
     email_list = [rec["Email"] for rec in a_students]
-    username_list = [_get_username(e) for e in email_list]
+    username_list = [_get_username(e, app_settings) for e in email_list]
     name_list = [rec["Student Name"] for rec in a_students]
     status_list = [_get_status(rec) for rec in a_students]
 
@@ -887,7 +924,7 @@ def update_registrations(
         #         pprint(rec)
         try:
             student = get_or_create_student(
-                rec, section, require_valid_login, request_user
+                rec, section, require_valid_login, request_user, app_settings
             )
         except InvalidUsername as invalid:
             if return_invalid_logins:
@@ -909,9 +946,11 @@ def update_registrations(
         saved_student_count += 1
 
     # de-register non-verifications
-    dereg_list = Student_Registration.objects.filter(
-        active=True, section__in=aurora_section_qs
-    ).exclude(student__student_number__in=valid_student_numbers)
+    dereg_list = (
+        Student_Registration.objects.for_display()
+        .filter(active=True, section__in=aurora_section_qs)
+        .exclude(student__student_number__in=valid_student_numbers)
+    )
     dereg_list = dereg_list.exclude(status="N")
     for reg in dereg_list:
         reg.student.History_Update(
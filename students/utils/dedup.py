@@ -0,0 +1,343 @@
+"""
+Duplicate person detection, for the whole people table at once.
+
+People are loaded in a few queries, grouped into candidate blocks
+(same normalised surname and initial, same email address, or same
+student number), and every candidate pair is scored in one vectorised
+pass.  Pairs scoring at least the threshold are joined into groups (best
+first, and never so that a group holds two people with different
+usernames or student numbers), and each group gets a merge plan: the
+record to keep and the duplicates to merge into it.  Nothing is changed
+in the database.
+"""
+################################################################
+from __future__ import print_function, unicode_literals
+
+import re
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+from people.models import EmailAddress, Person
+
+from ..models import Student
+
+################################################################
+
+# Blocks larger than this are too common to be informative
+#   (e.g., "smith j") and are skipped.
+MAX_BLOCK = 200
+
+THRESHOLD = 0.8
+
+# The same full name (with nothing in conflict) is enough on its own:
+#   e.g., a person created by an import with only a name.
+SCORE_WEIGHTS = {
+    "email": 0.6,
+    "student_number": 0.8,
+    "surname": 0.4,
+    "given_name": 0.4,
+    "initial": 0.1,
+    # different usernames or student numbers: not the same person.
+    "conflict": -2.0,
+}
+
+NON_ALNUM = re.compile(r"[^a-z0-9]")
+
+MergeGroup = namedtuple("MergeGroup", ["survivor", "duplicates"])
+Duplicate = namedtuple("Duplicate", ["pk", "score", "reasons"])
+
+################################################################
+
+
+def normalize(value):
+    """
+    Lower case ASCII letters and digits only: accents, punctuation and
+    spaces are dropped.
+    """
+    value = unicodedata.normalize("NFKD", "{}".format(value or ""))
+    return NON_ALNUM.sub("", value.encode("ascii", "ignore").decode("ascii").lower())
+
+
+def normalize_student_number(value):
+    """
+    Digits only, without leading zeros.
+    """
+    return re.sub(r"\D", "", "{}".format(value or "")).lstrip("0")
+
+
+################################################################
+
+
+class PersonTable(object):
+    """
+    Columnar (normalised) data for a list of people.
+    Rows are indexed by position; ``pk`` maps a row to the Person pk.
+    ``emails`` is a list of ``(row, address)`` pairs.
+    """
+
+    def __init__(self, people, student_numbers=None, emails=None):
+        """
+        ``people`` is a list of ``(pk, sn, given_name, username, active)``;
+        ``student_numbers`` maps person pk -> student number;
+        ``emails`` is a list of ``(person pk, address)`` pairs.
+        """
+        student_numbers = student_numbers or {}
+        self.pk = np.array([row[0] for row in people], dtype=np.int64)
+        self.label = ["{}, {}".format(row[1], row[2]) for row in people]
+        self.surname = [normalize(row[1]) for row in people]
+        self.given_name = [normalize(row[2]) for row in people]
+        self.username = [row[3] or "" for row in people]
+        self.active = np.array([bool(row[4]) for row in people], dtype=bool)
+        self.student_number = [
+            normalize_student_number(student_numbers.get(row[0])) for row in people
+        ]
+        self.has_student = np.array(
+            [row[0] in student_numbers for row in people], dtype=bool
+        )
+        index = {pk: i for i, pk in enumerate(self.pk.tolist())}
+        self.emails = [
+            (index[person_id], address.strip().lower())
+            for person_id, address in (emails or [])
+            if person_id in index and address and address.strip()
+        ]
+
+    def __len__(self):
+        return len(self.pk)
+
+
+def load_people(include_inactive=False):
+    """
+    Load the ``PersonTable`` for every person (only active people,
+    unless ``include_inactive``), in three queries.
+    """
+    qs = Person.objects.all()
+    if not include_inactive:
+        qs = qs.filter(active=True)
+    people = list(
+        qs.order_by("pk").values_list("pk", "sn", "given_name", "username", "active")
+    )
+    student_numbers = dict(
+        Student.objects.values_list("person_id", "student_number").iterator()
+    )
+    emails = list(
+        EmailAddress.objects.filter(active=True)
+        .values_list("person_id", "address")
+        .iterator()
+    )
+    return PersonTable(people, student_numbers, emails)
+
+
+################################################################
+
+
+def _codes(values):
+    """
+    Integer codes for a list of strings; empty strings get -1.
+    """
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    uniques, codes = np.unique(np.array(values, dtype=object), return_inverse=True)
+    if uniques[0] == "":
+        codes = codes - 1
+    return codes.astype(np.int64)
+
+
+def _blocks(rows, keys):
+    """
+    Group the rows (an integer array) by their (non-empty) keys.
+    """
+    codes = _codes(keys)
+    keep = codes >= 0
+    rows, codes = rows[keep], codes[keep]
+    order = np.argsort(codes, kind="stable")
+    rows, codes = rows[order], codes[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    return np.split(rows, bounds)
+
+
+def _pairs(blocks, max_block):
+    """
+    All of the ``(i, j)`` pairs (with ``i < j``) within the blocks.
+    """
+    pairs = []
+    for members in blocks:
+        n = len(members)
+        if n < 2 or n > max_block:
+            continue
+        i, j = np.triu_indices(n, 1)
+        a, b = members[i], members[j]
+        pairs.append(np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(pairs)
+
+
+def candidate_pairs(table, max_block=MAX_BLOCK):
+    """
+    Return ``(pairs, email_pairs)``: every candidate pair of rows, and the
+    pairs which share an email address (both as ``(n, 2)`` arrays).
+    """
+    rows = np.arange(len(table), dtype=np.int64)
+    name_keys = [
+        "{}|{}".format(sn, given[:1]) if sn else ""
+        for sn, given in zip(table.surname, table.given_name)
+    ]
+    email_rows = np.array([row for row, address in table.emails], dtype=np.int64)
+    email_pairs = _pairs(
+        _blocks(email_rows, [address for row, address in table.emails]), max_block
+    )
+    pairs = np.concatenate(
+        [
+            _pairs(_blocks(rows, name_keys), max_block),
+            _pairs(_blocks(rows, table.student_number), max_block),
+            email_pairs,
+        ]
+    )
+    if len(pairs):
+        pairs = np.unique(pairs, axis=0)
+    return pairs, email_pairs
+
+
+def score_pairs(table, pairs, email_pairs, weights=None):
+    """
+    Score every candidate pair at once.
+    Returns ``(scores, reasons)``: an array of scores, and a list of the
+    (comma separated) reasons for each pair.
+    """
+    weights = weights or SCORE_WEIGHTS
+    a, b = pairs[:, 0], pairs[:, 1]
+
+    def _same(codes):
+        return (codes[a] >= 0) & (codes[a] == codes[b])
+
+    def _differ(codes):
+        return (codes[a] >= 0) & (codes[b] >= 0) & (codes[a] != codes[b])
+
+    surname = _codes(table.surname)
+    given_name = _codes(table.given_name)
+    initial = _codes([given[:1] for given in table.given_name])
+    username = _codes(table.username)
+    number = _codes(table.student_number)
+
+    n = max(len(table), 1)
+    features = {
+        "email": np.isin(a * n + b, email_pairs[:, 0] * n + email_pairs[:, 1]),
+        "student_number": _same(number),
+        "surname": _same(surname),
+        "given_name": _same(given_name),
+        "initial": _same(initial) & ~_same(given_name),
+        "conflict": _differ(username) | _differ(number),
+    }
+    scores = np.zeros(len(pairs))
+    for name, feature in features.items():
+        scores += weights[name] * feature
+    scores = np.round(scores, 3)
+    reasons = [
+        ",".join(name for name in features if features[name][k])
+        for k in range(len(pairs))
+    ]
+    return scores, reasons
+
+
+################################################################
+
+
+def _conflict(table, i, j):
+    """
+    True when rows i and j have different usernames or student numbers.
+    """
+    return any(
+        values[i] and values[j] and values[i] != values[j]
+        for values in (table.username, table.student_number)
+    )
+
+
+def _components(table, pairs):
+    """
+    The groups (lists of rows, with more than one member) joined by the
+    given edges, in order: an edge which would put two conflicting rows
+    in the same group is skipped.
+    """
+    parent = list(range(len(table)))
+    members = {}
+
+    def _find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        ri, rj = _find(i), _find(j)
+        if ri == rj:
+            continue
+        group_i, group_j = members.get(ri, [ri]), members.get(rj, [rj])
+        if any(_conflict(table, a, b) for a in group_i for b in group_j):
+            continue
+        root, other = min(ri, rj), max(ri, rj)
+        parent[other] = root
+        members[root] = group_i + group_j
+        members.pop(other, None)
+    return [sorted(group) for root, group in sorted(members.items())]
+
+
+def merge_plan(table, pairs, scores, reasons, threshold=THRESHOLD):
+    """
+    Join the pairs scoring at least ``threshold`` into groups (see
+    ``_components()``: conflicting people are never joined), and choose
+    the record to keep in each: the one with a username, then with a
+    student record, then active, then the oldest.
+    Returns a list of ``MergeGroup``s (of Person pks).
+    """
+    accepted = np.flatnonzero(scores >= threshold)
+    # the best pairs are joined first.
+    accepted = accepted[np.argsort(-scores[accepted], kind="stable")]
+    edges = pairs[accepted].tolist()
+    groups = _components(table, edges)
+
+    group_of = {row: n for n, members in enumerate(groups) for row in members}
+    best = {}  # row -> (score, reasons) of its best pair within its group.
+    for (i, j), k in zip(edges, accepted.tolist()):
+        if group_of.get(i, -1) != group_of.get(j, -2):
+            continue
+        for row in (i, j):
+            if row not in best or best[row][0] < scores[k]:
+                best[row] = (float(scores[k]), reasons[k])
+
+    plan = []
+    for members in groups:
+        survivor = max(
+            members,
+            key=lambda row: (
+                bool(table.username[row]),
+                bool(table.has_student[row]),
+                bool(table.active[row]),
+                -table.pk[row],
+            ),
+        )
+        duplicates = [
+            Duplicate(int(table.pk[row]), best[row][0], best[row][1])
+            for row in members
+            if row != survivor
+        ]
+        plan.append(MergeGroup(int(table.pk[survivor]), duplicates))
+    return plan
+
+
+def find_duplicates(
+    table=None, threshold=THRESHOLD, max_block=MAX_BLOCK, include_inactive=False
+):
+    """
+    The full pipeline; returns the ``merge_plan()``.
+    """
+    if table is None:
+        table = load_people(include_inactive)
+    pairs, email_pairs = candidate_pairs(table, max_block)
+    if not len(pairs):
+        return []
+    scores, reasons = score_pairs(table, pairs, email_pairs)
+    return merge_plan(table, pairs, scores, reasons, threshold)
+
+
+################################################################
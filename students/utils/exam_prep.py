@@ -0,0 +1,211 @@
+"""
+Exam preparation for a group of sections: the master list, the room
+assignment, the exam room listing, and the sign in sheets.
+"""
+
+################################################################
+from __future__ import print_function, unicode_literals
+
+import csv
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.template.loader import get_template
+
+from ..models import Student_Registration
+from .exam_rooms import (
+    MAX_LETTERS,
+    SEATS_PER_STUDENT,
+    assign_rooms,
+    make_blocks,
+    room_summary,
+)
+
+################################################################
+
+EXAM_ROOMS_TEMPLATE = "students/print/exam_rooms.tex"
+SIGNIN_TEMPLATE = "students/print/signin.tex"
+
+# The exam information which the LaTeX templates ``\input{exam_info}``:
+EXAM_INFO_COMMANDS = [
+    ("theCourse", "course"),
+    ("theExam", "exam"),
+    ("theExamDate", "date"),
+    ("theExamTime", "time"),
+    ("theDate", "date"),
+]
+
+LATEX_SPECIAL = re.compile(r"([&%$#_{}~^\\])")
+LATEX_REPLACEMENTS = {
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+    "\\": r"\textbackslash{}",
+}
+
+################################################################
+
+
+def latex_escape(value):
+    """
+    Escape the LaTeX special characters in value.
+    """
+    return LATEX_SPECIAL.sub(
+        lambda m: LATEX_REPLACEMENTS.get(m.group(1), "\\" + m.group(1)),
+        "{}".format(value),
+    )
+
+
+@lru_cache(maxsize=None)
+def _template(template_name):
+    """
+    Templates are compiled once per process.
+    """
+    return get_template(template_name)
+
+
+################################################################
+
+
+def exam_roster(sections, with_email=False):
+    """
+    The registrations in good standing for the given sections, sorted by
+    name, from a single query (with everything needed to render them).
+    With ``with_email=True`` each registration is annotated with the
+    ``preferred_email`` of the student.
+    """
+    roster = Student_Registration.objects.reg_list(
+        good_standing=True, section__in=sections
+    ).select_related("student__person", "section")
+    if with_email:
+        roster = roster.with_email()
+    return sorted(roster, key=lambda reg: reg.student.sn_comma_given.lower())
+
+
+def roster_classlist(roster):
+    """
+    The ``(name, student number, section name)`` classlist rows of the
+    roster, for room assignment.
+    """
+    return [
+        (
+            reg.student.sn_comma_given,
+            reg.student.student_number,
+            reg.section.section_name,
+        )
+        for reg in roster
+    ]
+
+
+################################################################
+
+
+def render_exam_files(output_dir, roster, summary, exam_info):
+    """
+    Render the master list, the exam room listing, the sign in sheets,
+    and the ``exam_info.tex`` they include, into output_dir.
+    ``summary`` is a ``room_summary()`` of the room assignment, and
+    ``exam_info`` is a dictionary with the keys course, exam, date and time.
+    Returns the list of the LaTeX files written.
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    def _write(filename, content):
+        path = os.path.join(output_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    _write(
+        "exam_info.tex",
+        "".join(
+            "\\newcommand{\\%s}{%s}\n" % (command, latex_escape(exam_info.get(key, "")))
+            for command, key in EXAM_INFO_COMMANDS
+        ),
+    )
+    # plain CSV (no HTML escaping), for the room assignment tools.
+    with open(
+        os.path.join(output_dir, "master_list.csv"), "w", encoding="utf-8", newline=""
+    ) as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n").writerows(
+            roster_classlist(roster)
+        )
+
+    object_list = [
+        (
+            latex_escape(room),
+            count,
+            latex_escape(start.title()),
+            latex_escape(stop.title()),
+            [[latex_escape(value) for value in row] for row in student_list],
+        )
+        for room, count, start, stop, student_list in summary
+    ]
+    context = {"object_list": object_list}
+    return [
+        _write("exam_rooms.tex", _template(EXAM_ROOMS_TEMPLATE).render(context)),
+        _write("signin.tex", _template(SIGNIN_TEMPLATE).render(context)),
+    ]
+
+
+################################################################
+
+
+def _compile_pdf(tex_path):
+    """
+    Compile one LaTeX file (twice, for the page references) in its own
+    directory.  Returns the pdflatex return code.
+    """
+    directory, filename = os.path.split(tex_path)
+    args = ["pdflatex", "-interaction=nonstopmode", "-halt-on-error", filename]
+    for i in range(2):
+        returncode = subprocess.call(
+            args, cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if returncode != 0:
+            break
+    return returncode
+
+
+def compile_pdfs(tex_paths, jobs=None):
+    """
+    Compile the LaTeX files into PDFs in parallel; every file is
+    compiled by its own pdflatex process.
+    Returns a dictionary mapping each file to the pdflatex return code.
+    """
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        return dict(zip(tex_paths, executor.map(_compile_pdf, tex_paths)))
+
+
+################################################################
+
+
+def prepare_exam(
+    sections,
+    rooms,
+    output_dir,
+    exam_info,
+    seats_per_student=SEATS_PER_STUDENT,
+    max_letters=MAX_LETTERS,
+    compile=True,
+    jobs=None,
+):
+    """
+    The full pipeline: one roster query for all of the sections, the room
+    assignment, the rendered files and (optionally) the compiled PDFs.
+
+    Returns a dictionary with the keys ``assignment`` (the room summary),
+    ``files`` (the LaTeX files) and ``pdf`` (pdflatex return codes).
+    """
+    roster = exam_roster(sections)
+    blocks = make_blocks(roster_classlist(roster), max_letters)
+    summary = room_summary(assign_rooms(blocks, rooms, seats_per_student))
+    tex_paths = render_exam_files(output_dir, roster, summary, exam_info)
+    pdf = compile_pdfs(tex_paths, jobs) if compile else {}
+    return {"assignment": summary, "files": tex_paths, "pdf": pdf}
+
+
+################################################################
@@ -0,0 +1,200 @@
+"""
+Alphabetical exam room assignment.
+
+Students are grouped into blocks by the first letters of their family
+names, and the blocks are given, in alphabetical order, to the rooms
+(in the order the rooms are listed) so that every room seats a
+contiguous range of the alphabet.
+"""
+################################################################
+from __future__ import print_function, unicode_literals
+
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+
+from ..models import Student_Registration
+
+################################################################
+
+SEATS_PER_STUDENT = 2
+MAX_LETTERS = 2
+
+################################################################
+
+
+class InsufficientCapacity(Exception):
+    pass
+
+
+################################################################
+
+
+def exam_classlist(sections):
+    """
+    Return the classlist for the given sections (a queryset) as rows
+    of ``(name, student number, section name)``, sorted by name,
+    from a single query.
+    Names are formatted as "Family, Given".
+    """
+    rows = Student_Registration.objects.reg_list(
+        good_standing=True, section__in=sections
+    ).values_list(
+        "student__person__sn",
+        "student__person__given_name",
+        "student__student_number",
+        "section__section_name",
+    )
+    classlist = [
+        ("{}, {}".format(sn, given_name), student_number, section_name)
+        for sn, given_name, student_number, section_name in rows.iterator()
+    ]
+    classlist.sort(key=lambda row: row[0].lower())
+    return classlist
+
+
+################################################################
+
+
+def make_blocks(classlist, max_letters=MAX_LETTERS):
+    """
+    Group the (sorted) classlist rows by the first ``max_letters``
+    letters of the name.  Returns a list of ``[prefix, rows]`` pairs,
+    in alphabetical order.
+    """
+    return [
+        [prefix, list(rows)]
+        for prefix, rows in groupby(
+            classlist, key=lambda row: row[0][:max_letters].lower()
+        )
+    ]
+
+
+################################################################
+
+
+def _fill(sizes_prefix, limits, fraction):
+    """
+    Greedily fill each room, in order, with as many blocks as fit in
+    ``fraction`` of its seats.  Returns the block index at which each
+    room ends; the assignment is complete if the last is ``len(blocks)``.
+    """
+    start = 0
+    cuts = []
+    for limit in limits:
+        allowance = int(fraction * limit + 1e-9)
+        # the furthest block boundary within the allowance:
+        end = bisect_right(sizes_prefix, sizes_prefix[start] + allowance) - 1
+        start = max(end, start)
+        cuts.append(start)
+    return cuts
+
+
+def assign_rooms(blocks, rooms, seats_per_student=SEATS_PER_STUDENT, iterations=60):
+    """
+    Assign the blocks (as returned by ``make_blocks()``) to the rooms,
+    a list of ``(room, capacity)`` pairs, minimizing the largest fraction
+    of any room's seats that is used.
+
+    Feasibility for a given fraction is a greedy pass using binary searches
+    on the prefix sums of the block sizes; the best fraction is then found by
+    bisection.  Raises ``InsufficientCapacity`` if the blocks cannot be seated.
+
+    Returns a list of ``(room, capacity, blocks)`` tuples.
+    """
+    sizes_prefix = [0]
+    for prefix, rows in blocks:
+        sizes_prefix.append(sizes_prefix[-1] + len(rows))
+    limits = [int(capacity) // seats_per_student for room, capacity in rooms]
+
+    if _fill(sizes_prefix, limits, 1.0)[-1:] != [len(blocks)]:
+        raise InsufficientCapacity(
+            "Cannot seat {} students at {} seats per student in {} seats".format(
+                sizes_prefix[-1],
+                seats_per_student,
+                sum(int(capacity) for room, capacity in rooms),
+            )
+        )
+
+    low, high = 0.0, 1.0
+    for i in range(iterations):
+        middle = (low + high) / 2
+        if _fill(sizes_prefix, limits, middle)[-1] == len(blocks):
+            high = middle
+        else:
+            low = middle
+    cuts = _fill(sizes_prefix, limits, high)
+
+    results = []
+    start = 0
+    for (room, capacity), end in zip(rooms, cuts):
+        results.append((room, int(capacity), blocks[start:end]))
+        start = end
+    return results
+
+
+################################################################
+
+
+def validate_assignment(assignment, seats_per_student=SEATS_PER_STUDENT):
+    """
+    Check an assignment (as returned by ``assign_rooms()``) in a single
+    pass: the alphabetical ranges of the rooms must be in order and
+    non-overlapping, and no room may be over capacity.
+    Returns a list of problems; an empty list means the assignment is valid.
+    """
+    problems = []
+    previous = None
+    for room, capacity, blocks in assignment:
+        count = 0
+        for prefix, rows in blocks:
+            if previous is not None and prefix <= previous:
+                problems.append(
+                    "{}: {!r} is out of alphabetical order".format(room, prefix)
+                )
+            previous = prefix
+            count += len(rows)
+        if count * seats_per_student > capacity:
+            problems.append(
+                "{}: {} students exceeds the capacity of {}".format(
+                    room, count, capacity
+                )
+            )
+    return problems
+
+
+################################################################
+
+
+def room_summary(assignment):
+    """
+    Summarize an assignment as ``(room, count, start, stop, student_list)``
+    tuples (the form used by the exam room and sign in sheet templates).
+    Rooms without any students are omitted.
+    """
+    results = []
+    for room, capacity, blocks in assignment:
+        if not blocks:
+            continue
+        student_list = [row for prefix, rows in blocks for row in rows]
+        results.append(
+            (room, len(student_list), blocks[0][0], blocks[-1][0], student_list)
+        )
+    return results
+
+
+################################################################
+
+
+def count_by_start(classlist, starts):
+    """
+    Given the sorted classlist and the (alphabetical) starting names of
+    consecutive rooms, count the students in each room.
+    """
+    names = [row[0].lower() for row in classlist]
+    bounds = [bisect_left(names, start.lower()) for start in starts]
+    bounds[0:1] = [0]  # the first room also takes everyone before it.
+    bounds.append(len(names))
+    return [bounds[i + 1] - bounds[i] for i in range(len(starts))]
+
+
+################################################################
@@ -0,0 +1,318 @@
+"""
+Load testing for the self-registration wizard.
+
+``seed()`` creates synthetic sections (with registration requirements)
+in the current term and synthetic users; ``run_load()`` then drives the
+wizard (register, confirm, and the page which follows) for every user,
+with many concurrent test clients, and ``summarize()`` reports the
+latency percentiles, queries per request and error rate of each step.
+``cleanup()`` removes everything which was seeded.
+
+All synthetic records are named with a prefix, so that they are easy to
+find (and remove).  Run this against a development database only.
+"""
+################################################################
+from __future__ import print_function, unicode_literals
+
+import random
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from classes.models import Section, Semester
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.text import slugify
+from people.models import Person
+
+from ..models import SectionRequirement, Student, Student_Registration
+
+################################################################
+
+PREFIX = "loadtest"
+# Synthetic student numbers are 7 digits, starting here.
+STUDENT_NUMBER_BASE = 9100000
+# Synthetic CRNs are 5 digits, starting here.
+CRN_BASE = 90000
+PERCENTILES = [50, 90, 99]
+
+GIVEN_NAMES = """
+    Alex Amira Ben Chen Dana Emeka Fatima Gabriel Hana Ivan Jasmine Kiran
+    Liam Maya Noah Olivia Priya Quinn Rosa Sam Tariq Uma Victor Wei
+""".split()
+SURNAMES = """
+    Anderson Bouchard Campbell Dubois Erikson Fontaine Gill Huang Ibrahim
+    Johnson Kaur Lavoie Martin Nguyen Okafor Patel Roy Singh Thompson Wong
+""".split()
+
+TOKEN_RE = re.compile(r'name="token"[^>]*value="([0-9a-f]+)"')
+
+SyntheticStudent = namedtuple(
+    "SyntheticStudent",
+    ["username", "given_name", "sn", "student_number", "email", "section_pk"],
+)
+# One request of the wizard: ``ok`` is False for an error.
+Sample = namedtuple("Sample", ["step", "seconds", "queries", "ok"])
+
+################################################################
+
+
+def synthetic_students(count, sections, prefix=PREFIX, seed=None):
+    """
+    Generate ``count`` synthetic students, spread over the given
+    section pks (reproducibly, for a given ``seed``).
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        username = "{}{:05d}".format(prefix, i)
+        yield SyntheticStudent(
+            username=username,
+            given_name=rng.choice(GIVEN_NAMES),
+            sn=rng.choice(SURNAMES),
+            student_number="{}".format(STUDENT_NUMBER_BASE + i),
+            email="{}@example.com".format(username),
+            section_pk=sections[i % len(sections)],
+        )
+
+
+def check_collisions(course, term, sections, students, prefix=PREFIX):
+    """
+    Raise RuntimeError if the synthetic sections, CRNs or student numbers
+    would collide with existing (not synthetic) records.
+    """
+    section_names = ["LT{:02d}".format(i) for i in range(sections)]
+    crns = ["{}".format(CRN_BASE + i) for i in range(sections)]
+    real_sections = Section.objects.filter(term=term).exclude(slug__startswith=prefix)
+    taken = list(
+        real_sections.filter(course=course, section_name__in=section_names)
+        .values_list("section_name", flat=True)
+        .order_by("section_name")
+    )
+    if taken:
+        raise RuntimeError(
+            "The section(s) {} of {} already exist.".format(", ".join(taken), course)
+        )
+    taken = list(
+        real_sections.filter(crn__in=crns).values_list("crn", flat=True).order_by("crn")
+    )
+    if taken:
+        raise RuntimeError("The CRN(s) {} are already used.".format(", ".join(taken)))
+    taken = (
+        Student.objects.filter(
+            student_number__gte=STUDENT_NUMBER_BASE,
+            student_number__lt=STUDENT_NUMBER_BASE + students,
+        )
+        .exclude(person__username__startswith=prefix)
+        .count()
+    )
+    if taken:
+        raise RuntimeError(
+            "{} student number(s) from {} are already used.".format(
+                taken, STUDENT_NUMBER_BASE
+            )
+        )
+
+
+def seed(course, sections=10, students=100, prefix=PREFIX, seed=None):
+    """
+    Create ``sections`` synthetic sections of the course in the current
+    term (advertised for registration), and a user for each of the
+    ``students`` synthetic students.
+    Nothing is created when any of them would collide with existing
+    records (see ``check_collisions()``).
+    Returns the list of ``SyntheticStudent``s.
+    """
+    term = Semester.objects.get_current()
+    check_collisions(course, term, sections, students, prefix)
+    section_pks = []
+    for i in range(sections):
+        section_name = "LT{:02d}".format(i)
+        # by slug (which has the prefix): never a real section.
+        section, created = Section.objects.get_or_create(
+            slug=slugify(" ".join([prefix, course.slug, section_name])),
+            defaults={
+                "course": course,
+                "term": term,
+                "section_name": section_name,
+                "active": True,
+                "crn": "{}".format(CRN_BASE + i),
+            },
+        )
+        SectionRequirement.objects.get_or_create(section=section)
+        section_pks.append(section.pk)
+
+    population = list(synthetic_students(students, section_pks, prefix, seed))
+    User = get_user_model()
+    existing = set(
+        User.objects.filter(username__startswith=prefix).values_list(
+            "username", flat=True
+        )
+    )
+    users = []
+    for s in population:
+        if s.username in existing:
+            continue
+        user = User(
+            username=s.username,
+            first_name=s.given_name,
+            last_name=s.sn,
+            email=s.email,
+        )
+        user.set_unusable_password()
+        users.append(user)
+    User.objects.bulk_create(users, batch_size=500)
+    return population
+
+
+def cleanup(prefix=PREFIX):
+    """
+    Remove everything created by ``seed()`` and the wizard runs.
+    """
+    sections = Section.objects.filter(slug__startswith=prefix)
+    Student_Registration.objects.filter(section__in=sections).delete()
+    Student.objects.filter(person__username__startswith=prefix).delete()
+    Person.objects.filter(username__startswith=prefix).delete()
+    get_user_model().objects.filter(username__startswith=prefix).delete()
+    sections.delete()
+
+
+################################################################
+
+
+def _request(samples, step, expected, method, *args, **kwargs):
+    """
+    Make one request, and record its sample: any response other than
+    the ``expected`` status code is an error.
+    Returns the response, or None on an error.
+    """
+    start = time.perf_counter()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = method(*args, **kwargs)
+    except Exception:
+        samples.append(Sample(step, time.perf_counter() - start, 0, False))
+        return None
+    ok = response.status_code == expected
+    samples.append(Sample(step, time.perf_counter() - start, len(queries), ok))
+    return response if ok else None
+
+
+def run_wizard(student):
+    """
+    Run one synthetic student through the wizard, with its own client.
+    Returns the list of ``Sample``s; the run stops at the first error.
+    """
+    samples = []
+    client = Client()
+    try:
+        client.force_login(get_user_model().objects.get(username=student.username))
+        section = Section.objects.get(pk=student.section_pk)
+        register_url = reverse("students-register-start")
+        if _request(samples, "register", 200, client.get, register_url) is None:
+            return samples
+        response = _request(
+            samples,
+            "register (post)",
+            302,
+            client.post,
+            register_url,
+            {
+                "course_section": student.section_pk,
+                "student_number": student.student_number,
+                "email": student.email,
+            },
+        )
+        if response is None:
+            return samples
+        confirm_url = reverse("students-register-confirm")
+        response = _request(samples, "confirm", 200, client.get, confirm_url)
+        if response is None:
+            return samples
+        match = TOKEN_RE.search(response.content.decode("utf-8"))
+        response = _request(
+            samples,
+            "confirm (post)",
+            302,
+            client.post,
+            confirm_url,
+            {"CRN": section.crn, "token": match.group(1) if match else ""},
+        )
+        if response is None:
+            return samples
+        # the first requirement, or the thanks page.
+        _request(samples, "next", 200, client.get, response["Location"])
+    finally:
+        # each worker thread has its own connection.
+        connection.close()
+    return samples
+
+
+def _run_batch(students):
+    return [sample for student in students for sample in run_wizard(student)]
+
+
+def run_load(population, concurrency=10, processes=False):
+    """
+    Run every synthetic student through the wizard, ``concurrency``
+    at a time, in threads (or in processes).
+    Returns the list of all ``Sample``s.
+    """
+    if processes:
+        # child processes must not share the parent's connections.
+        connections.close_all()
+        with ProcessPoolExecutor(concurrency) as executor:
+            batches = [population[i::concurrency] for i in range(concurrency)]
+            return [
+                sample
+                for batch in executor.map(_run_batch, batches)
+                for sample in batch
+            ]
+    with ThreadPoolExecutor(concurrency) as executor:
+        return [
+            sample
+            for samples in executor.map(run_wizard, population)
+            for sample in samples
+        ]
+
+
+################################################################
+
+
+def summarize(samples, percentiles=PERCENTILES):
+    """
+    Summarize the samples for each step of the wizard, in order.
+    Returns a list of dictionaries with the ``step``, the number of
+    ``requests``, the ``errors`` and ``error_rate``, the latency
+    percentiles (``p50``, ...; in milliseconds) and the mean and
+    maximum ``queries`` per request.
+    """
+    steps = []
+    for sample in samples:
+        if sample.step not in steps:
+            steps.append(sample.step)
+    summary = []
+    for step in steps:
+        rows = [s for s in samples if s.step == step]
+        seconds = np.array([s.seconds for s in rows])
+        queries = np.array([s.queries for s in rows if s.ok] or [0])
+        errors = sum(1 for s in rows if not s.ok)
+        info = {
+            "step": step,
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows),
+            "queries": float(queries.mean()),
+            "max_queries": int(queries.max()),
+        }
+        for p, value in zip(percentiles, np.percentile(seconds, percentiles)):
+            info["p{}".format(p)] = value * 1000
+        summary.append(info)
+    return summary
+
+
+################################################################
@@ -0,0 +1,100 @@
+"""
+Batched email sending: one reused connection, messages sent in batches
+with an optional delay between them, and a progress file so that an
+interrupted run can be resumed without sending duplicates.
+"""
+
+################################################################
+from __future__ import print_function, unicode_literals
+
+import os
+import time
+
+from django.core.mail import EmailMessage, get_connection
+
+################################################################
+
+BATCH_SIZE = 50
+
+################################################################
+
+
+def load_progress(filename):
+    """
+    The set of message keys already sent, according to the progress file.
+    """
+    if not filename or not os.path.exists(filename):
+        return set()
+    with open(filename, encoding="utf-8") as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+def _record_progress(filename, keys):
+    if not filename:
+        return
+    with open(filename, "a", encoding="utf-8") as f:
+        for key in keys:
+            f.write("{}\n".format(key))
+
+
+def send_batched(
+    messages,
+    batch_size=BATCH_SIZE,
+    delay=0,
+    progress_file=None,
+    connection=None,
+    fail_silently=False,
+):
+    """
+    Send the messages, an iterable of ``(key, EmailMessage)`` pairs, over
+    one connection (opened once, or the one given) in batches of
+    ``batch_size``, sleeping ``delay`` seconds between batches.
+
+    The keys of sent messages are appended to ``progress_file`` after
+    every batch; messages whose keys are already recorded there, or
+    were already seen in this run, are skipped.  Returns a ``(sent, skipped)`` tuple of counts.
+    """
+    done = load_progress(progress_file)
+    if connection is None:
+        connection = get_connection(fail_silently=fail_silently)
+    sent = skipped = 0
+
+    def _flush(batch):
+        if not batch:
+            return 0
+        count = connection.send_messages([msg for key, msg in batch]) or 0
+        _record_progress(progress_file, [key for key, msg in batch])
+        return count
+
+    connection.open()
+    try:
+        batch = []
+        for key, message in messages:
+            key = "{}".format(key)
+            if key in done:
+                skipped += 1
+                continue
+            batch.append((key, message))
+            done.add(key)  # duplicates within this run, too.
+            if len(batch) >= batch_size:
+                sent += _flush(batch)
+                batch = []
+                if delay:
+                    time.sleep(delay)
+        sent += _flush(batch)
+    finally:
+        connection.close()
+    return sent, skipped
+
+
+def render_message(subject_template, body_template, context, to, from_email=None):
+    """
+    Build an EmailMessage from (already compiled) subject and body
+    templates.  The subject is collapsed onto a single line.
+    """
+    subject = " ".join(subject_template.render(context).split())
+    body = body_template.render(context)
+    return EmailMessage(subject, body, from_email, [to])
+
+
+################################################################
@@ -0,0 +1,602 @@
+"""
+Query count and time budgets for the students application.
+
+Every budgeted check (a manager method, view or template tag) is
+registered with ``@check(name)``, and ``BUDGETS`` is the one table of
+the maximum number of queries and milliseconds for each of them, so
+that raising a budget is a deliberate change.  A check must have a
+budget (and a budget a check); ``EXEMPT`` lists what is deliberately
+not budgeted, and why.
+
+Checks are functions of the fixtures built by
+``students.tests.fixtures.build_fixtures()`` (at a realistic scale, so
+that a query per row is well over any budget); ``run_budgets()``
+measures each check once it is warm.  The budgets are asserted by
+``students.tests.test_query_budgets``, and reported by the
+``query_budgets`` CLI; both use a test database.
+"""
+################################################################
+from __future__ import print_function, unicode_literals
+
+import time
+import unittest
+from collections import namedtuple
+
+from classes.models import Section
+from django.db import connection
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import (
+    RequirementCheck,
+    RequirementTag,
+    SectionRequirement,
+    Student,
+    Student_Registration,
+    iclicker,
+)
+from ..templatetags.student_tags import (
+    has_completed_requirement,
+    requirement_list,
+    requirement_qs,
+)
+from ..views import (
+    ALL_REQUIREMENTS,
+    REQUIREMENT_BASENAME,
+    next_requirement_redirect,
+)
+
+################################################################
+
+Budget = namedtuple("Budget", ["queries", "milliseconds"])
+
+# Time budgets are compared with the best of this many runs.
+REPEAT = 5
+
+# The budgets assume at most a few requirements in
+#   STUDENTS_REGISTRATION_REQUIREMENTS.
+BUDGETS = {
+    # managers and querysets
+    "Student.objects.active": Budget(1, 100),
+    "Student.objects.with_email": Budget(1, 200),
+    "Student.objects.get_from_username": Budget(1, 20),
+    "Student.objects.get_from_user": Budget(1, 20),
+    "Student.objects.get_or_create_from_user": Budget(8, 50),
+    "Student_Registration.objects.reg_list": Budget(1, 200),
+    "Student_Registration.objects.for_display": Budget(1, 200),
+    "Student_Registration.objects.with_email": Budget(1, 200),
+    "Student_Registration.objects.get_current": Budget(2, 200),
+    "Student_Registration.objects.get_students_pk": Budget(1, 50),
+    "Student_Registration.objects.get_students": Budget(1, 100),
+    "Student_Registration.objects.enrollment_count": Budget(1, 20),
+    "RequirementTag.objects.has": Budget(1, 20),
+    "SectionRequirement.objects.get_current": Budget(3, 100),
+    "SectionRequirement.objects.get_next_term": Budget(3, 100),
+    "SectionRequirement.objects.get_current_sections": Budget(3, 50),
+    "SectionRequirement.objects.get_next_term_sections": Budget(3, 50),
+    "SectionRequirement.objects.get_advertised_sections": Budget(3, 50),
+    "SectionRequirement.objects.sections_by_req": Budget(3, 50),
+    "SectionRequirement.objects.for_section": Budget(2, 20),
+    "SectionRequirement.objects.exists": Budget(2, 20),
+    "SectionRequirement.objects.assign": Budget(12, 200),
+    "RequirementCheck.objects.add": Budget(14, 50),
+    "RequirementCheck.objects.for_display": Budget(1, 200),
+    "RequirementCheck.objects.is_complete": Budget(1, 20),
+    "RequirementCheck.objects.completion_matrix": Budget(1, 300),
+    "RequirementCheck.objects.matrix": Budget(1, 300),
+    "iclicker.objects.for_display": Budget(1, 200),
+    "iclicker.objects.search": Budget(1, 100),
+    # registration helpers
+    "views.next_requirement_redirect": Budget(8, 50),
+    # template tags
+    "student_tags.requirement_qs": Budget(2, 20),
+    "student_tags.requirement_list": Budget(2, 20),
+    "student_tags.has_completed_requirement": Budget(1, 20),
+    "student_tags.template": Budget(4, 50),
+    # registration wizard
+    "view.students-register-start": Budget(12, 500),
+    "view.students-register-start (post)": Budget(20, 500),
+    "view.students-register-confirm": Budget(12, 500),
+    "view.students-register-confirm (post)": Budget(12, 500),
+    "view.students-regreq": Budget(12, 500),
+    "view.students-regreq (post)": Budget(12, 500),
+    "view.students-register-thanks": Budget(10, 500),
+    # i>clicker views
+    "view.students-iclicker-list": Budget(8, 500),
+    "view.students-iclicker-detail": Budget(8, 500),
+    "view.students-iclicker-create": Budget(8, 500),
+    # admin changelists
+    "admin.students_student_changelist": Budget(15, 1000),
+    "admin.students_student_registration_changelist": Budget(15, 1000),
+    "admin.students_student_registration_changelist.course": Budget(15, 1000),
+    "admin.students_iclicker_changelist": Budget(15, 1000),
+    "admin.students_sectionrequirement_changelist": Budget(15, 1000),
+    # admin views
+    "admin.students_student_lookup": Budget(5, 200),
+    "admin.students_section_lookup": Budget(5, 200),
+    "admin.students_roster_export": Budget(6, 500),
+}
+
+# What is not budgeted, and why.
+EXEMPT = {
+    "view.students-iclicker-create (post)": "each run would add an i>clicker",
+    "view.students-iclicker-update": "the same queries as the detail view",
+    "view.students-iclicker-delete": "each run would delete the fixture",
+    "admin.students_classlist_upload": (
+        "the cost of an upload grows with the file (see utils.aurora2)"
+    ),
+    "admin.students_report_upload": (
+        "the cost of an upload grows with the file (see utils.aurora2)"
+    ),
+}
+
+# The requirement label for the single requirement checks.
+LABEL = (ALL_REQUIREMENTS or ["honesty"])[0]
+
+TEMPLATE = Template(
+    "{% load student_tags %}"
+    "{% for label in section|requirement_list %}"
+    "{{ label }}:{{ registration|has_completed_requirement:label }} "
+    "{% endfor %}"
+)
+
+Result = namedtuple(
+    "Result",
+    ["name", "queries", "max_queries", "milliseconds", "max_ms", "error", "warning"],
+)
+
+################################################################
+
+CHECKS = {}
+
+
+def check(name):
+    """
+    Register a budgeted check: a function of the fixtures (see
+    ``students.tests.fixtures.Fixtures``).
+    """
+
+    def _register(func):
+        CHECKS[name] = func
+        return func
+
+    return _register
+
+
+def _get(client, url, expected=200):
+    response = client.get(url)
+    if response.status_code != expected:
+        raise AssertionError("GET {} returned {}".format(url, response.status_code))
+    return response
+
+
+def _post(client, url, data, expected=302):
+    response = client.post(url, data)
+    if response.status_code != expected:
+        raise AssertionError("POST {} returned {}".format(url, response.status_code))
+    return response
+
+
+def _requirement_url():
+    """
+    The url of the first registration requirement view;
+    the check is skipped when there are none in the settings.
+    """
+    if not ALL_REQUIREMENTS:
+        raise unittest.SkipTest("no STUDENTS_REGISTRATION_REQUIREMENTS")
+    return reverse(REQUIREMENT_BASENAME % ALL_REQUIREMENTS[0])
+
+
+################################################################
+
+
+@check("Student.objects.active")
+def _student_active(data):
+    list(Student.objects.active())
+
+
+@check("Student.objects.with_email")
+def _student_with_email(data):
+    [s.get_email_address() for s in Student.objects.with_email()]
+
+
+@check("Student.objects.get_from_username")
+def _student_get_from_username(data):
+    Student.objects.get_from_username(data.user.username)
+
+
+@check("Student.objects.get_from_user")
+def _student_get_from_user(data):
+    Student.objects.get_from_user(data.user)
+
+
+@check("Student.objects.get_or_create_from_user")
+def _student_get_or_create_from_user(data):
+    Student.objects.get_or_create_from_user(data.user)
+
+
+@check("Student_Registration.objects.reg_list")
+def _reg_list(data):
+    qs = Student_Registration.objects.reg_list(
+        good_standing=True, section__in=data.sections
+    )
+    ["{} {}".format(r.student, r.section) for r in qs.for_display()]
+
+
+@check("Student_Registration.objects.for_display")
+def _registration_for_display(data):
+    ["{}".format(r) for r in Student_Registration.objects.for_display()]
+
+
+@check("Student_Registration.objects.with_email")
+def _registration_with_email(data):
+    [r.preferred_email for r in Student_Registration.objects.with_email()]
+
+
+@check("Student_Registration.objects.get_current")
+def _registration_get_current(data):
+    ["{}".format(r.pk) for r in Student_Registration.objects.get_current()]
+
+
+@check("Student_Registration.objects.get_students_pk")
+def _get_students_pk(data):
+    list(Student_Registration.objects.get_students_pk(data.sections[0]))
+
+
+@check("Student_Registration.objects.get_students")
+def _get_students(data):
+    list(Student_Registration.objects.get_students(data.sections[0]))
+
+
+@check("Student_Registration.objects.enrollment_count")
+def _enrollment_count(data):
+    Student_Registration.objects.enrollment_count(data.sections[0])
+
+
+@check("RequirementTag.objects.has")
+def _tag_has(data):
+    RequirementTag.objects.has(LABEL)
+
+
+@check("SectionRequirement.objects.get_current")
+def _requirement_get_current(data):
+    ["{}".format(r.section) for r in SectionRequirement.objects.get_current()]
+
+
+@check("SectionRequirement.objects.get_next_term")
+def _requirement_get_next_term(data):
+    ["{}".format(r.section) for r in SectionRequirement.objects.get_next_term()]
+
+
+@check("SectionRequirement.objects.get_current_sections")
+def _current_sections(data):
+    list(SectionRequirement.objects.get_current_sections())
+
+
+@check("SectionRequirement.objects.get_next_term_sections")
+def _next_term_sections(data):
+    list(SectionRequirement.objects.get_next_term_sections())
+
+
+@check("SectionRequirement.objects.get_advertised_sections")
+def _advertised_sections(data):
+    list(SectionRequirement.objects.get_advertised_sections())
+
+
+@check("SectionRequirement.objects.for_section")
+def _for_section(data):
+    list(SectionRequirement.objects.for_section(data.sections[0]).all())
+
+
+@check("SectionRequirement.objects.exists")
+def _exists(data):
+    SectionRequirement.objects.exists(data.sections[0], LABEL)
+
+
+@check("SectionRequirement.objects.sections_by_req")
+def _sections_by_req(data):
+    list(SectionRequirement.objects.sections_by_req(LABEL))
+
+
+@check("SectionRequirement.objects.assign")
+def _assign(data):
+    # the sections have every requirement already: nothing is inserted.
+    SectionRequirement.objects.assign(
+        Section.objects.filter(pk__in=[section.pk for section in data.sections]),
+        [LABEL],
+        modify_existing=True,
+        exclude=[],
+    )
+
+
+@check("RequirementCheck.objects.add")
+def _add(data):
+    RequirementCheck.objects.add(data.registration, LABEL)
+
+
+@check("RequirementCheck.objects.for_display")
+def _check_for_display(data):
+    ["{}".format(c) for c in RequirementCheck.objects.for_display()]
+
+
+@check("RequirementCheck.objects.is_complete")
+def _is_complete(data):
+    RequirementCheck.objects.is_complete(data.registration, LABEL)
+
+
+@check("RequirementCheck.objects.completion_matrix")
+def _completion_matrix(data):
+    list(
+        RequirementCheck.objects.completion_matrix(
+            Student_Registration.objects.filter(section__in=data.sections),
+            ALL_REQUIREMENTS,
+        )
+    )
+
+
+@check("RequirementCheck.objects.matrix")
+def _matrix(data):
+    list(RequirementCheck.objects.matrix(data.sections, ALL_REQUIREMENTS))
+
+
+@check("iclicker.objects.for_display")
+def _iclicker_for_display(data):
+    ["{}".format(c) for c in iclicker.objects.for_display()]
+
+
+@check("iclicker.objects.search")
+def _iclicker_search(data):
+    list(iclicker.objects.search(data.iclicker.iclicker_id))
+
+
+@check("views.next_requirement_redirect")
+def _next_requirement_redirect(data):
+    next_requirement_redirect(data.registration, None)
+
+
+@check("student_tags.requirement_qs")
+def _requirement_qs(data):
+    list(requirement_qs(data.sections[0]).all())
+
+
+@check("student_tags.requirement_list")
+def _requirement_list(data):
+    list(requirement_list(data.sections[0]))
+
+
+@check("student_tags.has_completed_requirement")
+def _has_completed_requirement(data):
+    has_completed_requirement(data.registration, LABEL)
+
+
+@check("student_tags.template")
+def _template(data):
+    TEMPLATE.render(
+        Context({"section": data.sections[0], "registration": data.registration})
+    )
+
+
+@check("view.students-register-start")
+def _register_view(data):
+    _get(data.client, reverse("students-register-start"))
+
+
+@check("view.students-register-start (post)")
+def _register_post(data):
+    # the same student and section again: on to the confirmation.
+    _post(
+        data.client,
+        reverse("students-register-start"),
+        {
+            "course_section": data.registration.section_id,
+            "student_number": data.registration.student.student_number,
+            "email": data.user.email,
+        },
+    )
+
+
+@check("view.students-register-confirm")
+def _confirm_view(data):
+    # the registration exists: redirected to the next step.
+    _get(data.client, reverse("students-register-confirm"), expected=302)
+
+
+@check("view.students-register-confirm (post)")
+def _confirm_post(data):
+    # a repeated confirmation: processed, and redirected to the next step.
+    _post(
+        data.client,
+        reverse("students-register-confirm"),
+        {"CRN": data.registration.section.crn, "token": ""},
+    )
+
+
+@check("view.students-regreq")
+def _requirement_view(data):
+    _get(data.client, _requirement_url())
+
+
+@check("view.students-regreq (post)")
+def _requirement_post(data):
+    # an incomplete form: validated, and shown again.
+    _post(data.client, _requirement_url(), {}, expected=200)
+
+
+@check("view.students-register-thanks")
+def _thanks_view(data):
+    _get(data.client, reverse("students-register-thanks"))
+
+
+@check("view.students-iclicker-list")
+def _iclicker_list_view(data):
+    _get(data.client, reverse("students-iclicker-list"))
+
+
+@check("view.students-iclicker-detail")
+def _iclicker_detail_view(data):
+    _get(data.client, reverse("students-iclicker-detail", args=[data.iclicker.pk]))
+
+
+@check("view.students-iclicker-create")
+def _iclicker_create_view(data):
+    _get(data.client, reverse("students-iclicker-create"))
+
+
+def _changelist(name):
+    @check("admin." + name)
+    def _changelist_view(data):
+        _get(data.admin_client, reverse("admin:" + name))
+
+    return _changelist_view
+
+
+for _name in [
+    "students_student_changelist",
+    "students_student_registration_changelist",
+    "students_iclicker_changelist",
+    "students_sectionrequirement_changelist",
+]:
+    _changelist(_name)
+
+
+@check("admin.students_student_registration_changelist.course")
+def _registration_changelist_by_course(data):
+    # the course filter (its lookups, and the filtered list).
+    _get(
+        data.admin_client,
+        "{}?section__course={}".format(
+            reverse("admin:students_student_registration_changelist"),
+            data.sections[0].course_id,
+        ),
+    )
+
+
+@check("admin.students_student_lookup")
+def _student_lookup(data):
+    _get(
+        data.admin_client,
+        "{}?term={}".format(
+            reverse("admin:students_student_lookup"),
+            data.registration.student.person.sn,
+        ),
+    )
+
+
+@check("admin.students_section_lookup")
+def _section_lookup(data):
+    _get(
+        data.admin_client,
+        "{}?term={}".format(
+            reverse("admin:students_section_lookup"), data.sections[0].section_name
+        ),
+    )
+
+
+@check("admin.students_roster_export")
+def _roster_export(data):
+    response = _get(
+        data.admin_client,
+        reverse("admin:students_roster_export", args=[data.sections[0].pk]),
+    )
+    b"".join(response.streaming_content)
+
+
+################################################################
+
+
+def measure(func, data, repeat=REPEAT):
+    """
+    Run the check once (to warm up any caches), then ``repeat`` times.
+    Returns ``(queries, milliseconds)``: the number of queries of the
+    first measured run, and the best time of all of them.
+    """
+    func(data)
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            func(data)
+        times.append((time.perf_counter() - start) * 1000)
+        if i == 0:
+            count = len(queries)
+    return count, min(times)
+
+
+def run_budgets(data, budgets=None, names=None, repeat=REPEAT):
+    """
+    Measure every check (or only the ``names`` given) against its budget.
+    Returns a list of ``Result``s: ``error`` is None when the check ran
+    within its query budget (or was skipped, with a ``warning``).  Time budgets are advisory (machines vary):
+    a check over its time budget only gets a ``warning``.
+    """
+    budgets = BUDGETS if budgets is None else budgets
+    results = []
+    for name in sorted(set(CHECKS) | set(budgets)):
+        if names and name not in names:
+            continue
+        budget = budgets.get(name, Budget(0, 0))
+        if name not in CHECKS:
+            results.append(
+                Result(
+                    name,
+                    0,
+                    budget.queries,
+                    0,
+                    budget.milliseconds,
+                    "no check for this budget",
+                    None,
+                )
+            )
+            continue
+        if name not in budgets:
+            results.append(Result(name, 0, 0, 0, 0, "no budget for this check", None))
+            continue
+        try:
+            queries, milliseconds = measure(CHECKS[name], data, repeat)
+        except unittest.SkipTest as e:
+            results.append(
+                Result(
+                    name,
+                    0,
+                    budget.queries,
+                    0,
+                    budget.milliseconds,
+                    None,
+                    "skipped: {}".format(e),
+                )
+            )
+            continue
+        except Exception as e:
+            results.append(
+                Result(
+                    name,
+                    0,
+                    budget.queries,
+                    0,
+                    budget.milliseconds,
+                    "{}".format(e),
+                    None,
+                )
+            )
+            continue
+        error = warning = None
+        if queries > budget.queries:
+            error = "over budget: {} queries".format(queries)
+        if milliseconds > budget.milliseconds:
+            warning = "slow: {:.0f} ms".format(milliseconds)
+        results.append(
+            Result(
+                name,
+                queries,
+                budget.queries,
+                milliseconds,
+                budget.milliseconds,
+                error,
+                warning,
+            )
+        )
+    return results
+
+
+################################################################
@@ -0,0 +1,88 @@
+"""
+Registration interval analytics: how many students register again in
+the same courses some number of months (or more) after their first
+registration.
+
+Terms are indexed as ``t = 12y + m - 1``, where ``y`` is the year and
+``m`` the term code of the semester.
+"""
+################################################################
+from __future__ import print_function, unicode_literals
+
+import numpy as np
+
+from ..models import Student_Registration
+
+################################################################
+
+
+def term_index(year, term):
+    """
+    The term index of a semester, given its year and term code.
+    """
+    return 12 * int(year) + int("{}".format(term)[0]) - 1
+
+
+def term_from_index(t):
+    """
+    The ``(year, term code)`` of a term index.
+    """
+    return t // 12, "{}".format(t % 12 + 1)
+
+
+################################################################
+
+
+def registration_terms(course_slugs):
+    """
+    Return the ``(student_ids, term_indexes)`` arrays of every registration
+    in the given courses, from a single query.
+    """
+    rows = Student_Registration.objects.filter(
+        section__course__slug__in=course_slugs
+    ).values_list("student_id", "section__term__year", "section__term__term")
+    students = []
+    terms = []
+    for student_id, year, term in rows.iterator():
+        students.append(student_id)
+        terms.append(term_index(year, term))
+    return np.array(students, dtype=np.int64), np.array(terms, dtype=np.int64)
+
+
+################################################################
+
+
+def repeat_registrations(students, terms, threshold=12):
+    """
+    Given the ``registration_terms()`` arrays, compute for every term
+    with repeat registrations:
+        ``M_t``, the number of students registered in term ``t``
+            at least ``threshold`` months after their first term; and
+        ``N_t``, the number of registrations in term ``t``.
+
+    Returns the arrays ``(t, M_t, N_t)``.
+    """
+    empty = np.array([], dtype=np.int64)
+    if not len(terms):
+        return empty, empty, empty
+    term_values, N = np.unique(terms, return_counts=True)
+
+    # each student's first term:
+    student_values, inverse = np.unique(students, return_inverse=True)
+    first = np.full(len(student_values), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first, inverse, terms)
+
+    # distinct (student, term) pairs far enough from the first term:
+    repeat = terms - first[inverse] >= threshold
+    if not repeat.any():
+        return empty, empty, empty
+    pairs = np.unique(np.stack([inverse[repeat], terms[repeat]], axis=1), axis=0)
+    repeat_terms, repeat_counts = np.unique(pairs[:, 1], return_counts=True)
+
+    M = np.zeros_like(N)
+    M[np.searchsorted(term_values, repeat_terms)] = repeat_counts
+    mask = M != 0
+    return term_values[mask], M[mask], N[mask]
+
+
+################################################################
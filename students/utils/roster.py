@@ -0,0 +1,95 @@
+"""
+Roster exports: one row per registration, with the student's details,
+preferred email, status, and the completion of each requirement,
+from a single annotated query.
+"""
+################################################################
+from __future__ import print_function, unicode_literals
+
+import csv
+
+from ..managers import requirement_annotation
+from ..models import RequirementCheck, RequirementTag
+
+################################################################
+
+ROSTER_HEADER = [
+    "student number",
+    "family name",
+    "given name",
+    "username",
+    "email",
+    "section",
+    "status",
+]
+
+CHUNK_SIZE = 2000
+
+################################################################
+
+
+def roster_labels(sections):
+    """
+    The labels of the active requirements of the given sections.
+    """
+    return list(
+        RequirementTag.objects.filter(
+            active=True, sectionrequirement__section__in=sections
+        )
+        .order_by("label")
+        .values_list("label", flat=True)
+        .distinct()
+    )
+
+
+def roster_rows(registrations, labels):
+    """
+    Yield the header, and then a row for every registration
+    (a Student_Registration queryset).  Rows are fetched in chunks through
+    a server-side cursor (where the database supports it), so memory use
+    does not depend on the size of the roster.
+    """
+    names = [requirement_annotation(label) for label in labels]
+    qs = (
+        RequirementCheck.objects.completion_matrix(registrations.with_email(), labels)
+        .order_by(
+            "section__section_name",
+            "student__person__sn",
+            "student__person__given_name",
+        )
+        .values_list(
+            "student__student_number",
+            "student__person__sn",
+            "student__person__given_name",
+            "student__person__username",
+            "preferred_email",
+            "section__section_name",
+            "status",
+            *names
+        )
+    )
+    yield ROSTER_HEADER + list(labels)
+    for row in qs.iterator(chunk_size=CHUNK_SIZE):
+        fields = ["" if value is None else value for value in row[:7]]
+        yield fields + ["Y" if done else "N" for done in row[7:]]
+
+
+class Echo(object):
+    """
+    A file-like object which hands back what is written to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """
+    Render rows as CSV lines, one at a time (for streaming responses).
+    """
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+################################################################
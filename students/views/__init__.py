@@ -2,27 +2,54 @@
 Views for the students appliation.
 """
 import re
+import uuid
+from functools import lru_cache, wraps
 
 from classes.models import Section, Semester
 from django.conf import settings
 from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils.module_loading import import_string
 from django.utils.safestring import mark_safe
 from people.models import Person
-from uofm import auth, uofmauth
 
+from .. import conf
 from ..forms import ConfirmationForm, StudentForm
-from ..models import RequirementCheck, SectionRequirement, Student, Student_Registration
+from ..middleware import get_request_student, set_request_student
+from ..models import RequirementCheck, SectionRequirement, Student_Registration
 
 REQUIREMENT_BASENAME = "students-regreq-%s"
 REGISTRATION_THRESHOLD = 1.0
+# The session key of the idempotency token for the confirmation form.
+CONFIRM_TOKEN_KEY = "students_confirm_token"
 
 ALL_REQUIREMENTS = [
     e[0] for e in getattr(settings, "STUDENTS_REGISTRATION_REQUIREMENTS", [])
 ]
 
 
+@lru_cache(maxsize=None)
+def _auth_decorator(path):
+    return import_string(path)
+
+
+def registration_auth(view_func):
+    """
+    Protect a registration view with the decorator named by the
+    ``registration:auth_decorator`` setting.  The setting is looked up
+    on each request, so that it can be replaced (e.g., by the load test,
+    which runs without the campus authentication).
+    """
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        decorator = _auth_decorator(conf.get("registration:auth_decorator"))
+        return decorator(view_func)(request, *args, **kwargs)
+
+    return _wrapped
+
+
 def next_requirement_redirect(student_reg, current_label):
     """
     Based on the student registration, and _from, determine the next page view.
@@ -61,12 +88,13 @@ def get_student_registration(request):
         return None
     if not "student_pk" in request.session:
         return None
+    student = get_request_student(request)
+    if student is None or student.pk != request.session["student_pk"]:
+        return None
     # load registration
     try:
-        registration = Student_Registration.objects.get(
-            student__pk=request.session["student_pk"],
-            section__pk=request.session["section_pk"],
-            student__person__username=request.user.username.strip(),
+        registration = Student_Registration.objects.for_display().get(
+            student=student, section__pk=request.session["section_pk"]
         )
         return registration
 
@@ -88,7 +116,7 @@ def is_blacklisted_user(user):
     return re.match("^icm\d+", user.username) is not None
 
 
-@auth.uofm_only
+@registration_auth
 def register(request):
 
     initial_form_data = {}
@@ -97,15 +125,23 @@ def register(request):
 
     student = None
     if request.method == "POST":
-        form = StudentForm(request.user, request.POST)
+        form = StudentForm(
+            request.user, request.POST, student=get_request_student(request)
+        )
         if form.is_valid():
             student = form.process()
+        if student is not None:
+            set_request_student(request, student)
             # store student & course_section for confirm view
             request.session["student_pk"] = student.pk
             request.session["section_pk"] = form.cleaned_data["course_section"]
             return HttpResponseRedirect(reverse("students-register-confirm"))
     else:
-        form = StudentForm(request.user, initial=initial_form_data)
+        form = StudentForm(
+            request.user,
+            initial=initial_form_data,
+            student=get_request_student(request),
+        )
         student = form.student
 
     registration_open = is_registration_open()
@@ -121,7 +157,7 @@ def register(request):
     return render(request, "students/register.html", locals())
 
 
-@auth.uofm_only
+@registration_auth
 def confirm(request):
     if "section_pk" not in request.session or "student_pk" not in request.session:
         return HttpResponseRedirect(reverse("students-register-start"))
@@ -132,20 +168,34 @@ def confirm(request):
         return HttpResponseRedirect(reverse(next_requirement_redirect(reg, None)))
 
     section = Section.objects.get(pk=request.session["section_pk"])
-    student = Student.objects.get(pk=request.session["student_pk"])
+    student = get_request_student(request)
+    if student is None or student.pk != request.session["student_pk"]:
+        return HttpResponseRedirect(reverse("students-register-start"))
+
+    # Each confirmation form carries a token, which is used up by the
+    #   first submission.  A repeated submission (e.g., a double click) is
+    #   still processed: ConfirmationForm.process() locks the student, so
+    #   it waits for the first submission to commit, and is idempotent, so
+    #   it only returns the registration which was made.
+    token = request.session.get(CONFIRM_TOKEN_KEY)
+    if token is None:
+        token = request.session[CONFIRM_TOKEN_KEY] = uuid.uuid4().hex
 
+    form = None
     if request.method == "POST":
         if "Back" in request.POST:
             if request.POST["Back"] == "Back":
                 return HttpResponseRedirect(reverse("students.views.register"))
         form = ConfirmationForm(student, section, request.POST)
         if form.is_valid():
+            if form.cleaned_data["token"] == token:
+                del request.session[CONFIRM_TOKEN_KEY]
             # process form: activate registration and update student History
             reg = form.process()
             # finish up: redirect
             return HttpResponseRedirect(reverse(next_requirement_redirect(reg, None)))
-    else:
-        form = ConfirmationForm(student, section)
+    if form is None:
+        form = ConfirmationForm(student, section, initial={"token": token})
 
     allow_back = True
     registration_open = is_registration_open()
@@ -156,7 +206,7 @@ def confirm(request):
     return render(request, "students/confirm.html", locals())
 
 
-@auth.uofm_only
+@registration_auth
 def extra_requirement(request, label, form_class, template_name):
     reg = get_student_registration(request)
     if reg is None:
@@ -180,7 +230,7 @@ def extra_requirement(request, label, form_class, template_name):
     return render(request, template_name, locals())
 
 
-@auth.uofm_only
+@registration_auth
 def thanks(request):
     reg = get_student_registration(request)
     if reg is None:
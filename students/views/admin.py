@@ -5,13 +5,21 @@ Extended admin views for students appliation.
 ################################################################
 from __future__ import print_function, unicode_literals
 
+from classes.models import Section
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.utils.translation import ugettext_lazy as _
+from django.views.generic import View
 from django.views.generic.edit import FormView
 
 from ..forms import ClasslistCreateSectionUploadForm, StudentReportUploadForm
 from ..mixins import AdminSiteViewMixin
+from ..models import Student, Student_Registration
+from ..search import get_search_backend, search_terms
+from ..utils.roster import csv_lines, roster_labels, roster_rows
 
 ################################################################
 
@@ -22,9 +30,18 @@ class AdminClasslistUploadFormView(AdminSiteViewMixin, FormView):
     success_url = reverse_lazy("admin:app_list", kwargs={"app_label": "students"})
     initial = {"create_section": True, "create_all_students": True}
 
+    def get_reset_verification(self):
+        """
+        The section pks (from the ``reverify`` parameter) whose Aurora
+        verification is reset by the upload.
+        """
+        value = self.request.GET.get("reverify", "")
+        return [int(pk) for pk in value.split(",") if pk.strip().isdigit()]
+
     def get_form_kwargs(self, *args, **kwargs):
         form_kwargs = super().get_form_kwargs(*args, **kwargs)
         form_kwargs["request_user"] = getattr(self.request, "user", None)
+        form_kwargs["reset_verification"] = self.get_reset_verification()
         return form_kwargs
 
     def form_valid(self, form):
@@ -53,6 +70,11 @@ class AdminClasslistUploadFormView(AdminSiteViewMixin, FormView):
         context.update(
             submit_button_label="Save", page_header="Upload Aurora Classlist"
         )
+        reset_verification = self.get_reset_verification()
+        if reset_verification:
+            context["reverify_sections"] = Section.objects.filter(
+                pk__in=reset_verification
+            )
         return context
 
 
@@ -104,3 +126,146 @@ class AdminReportUploadFormView(AdminSiteViewMixin, FormView):
 
 
 ################################################################
+
+
+class AdminLookupView(View):
+    """
+    A paginated JSON lookup, in the format used by the admin autocomplete
+    widget (select2): ``?term=...&page=...``.
+    Each page fetches one extra row to determine whether there are more,
+    rather than counting the matches.
+    The user needs at least one of ``permissions``.
+
+    Subclasses set the ``model``, its ``search_fields`` and ``ordering``,
+    and the ``result_text`` of each result: a format string of the
+    ``result_fields`` of the row when these are given (only those
+    columns are fetched), or of the object (as ``obj``) otherwise.
+    """
+
+    model = None
+    paginate_by = 20
+    search_fields = []
+    ordering = None
+    select_related = []
+    result_fields = []
+    result_text = "{obj}"
+    permissions = [
+        "students.add_student_registration",
+        "students.change_student_registration",
+        "students.add_iclicker",
+        "students.change_iclicker",
+    ]
+
+    def get_queryset(self):
+        """
+        The active objects of the model, in order.
+        """
+        qs = self.model._default_manager.filter(active=True)
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        if self.ordering:
+            qs = qs.order_by(*self.ordering)
+        return qs
+
+    def get_results(self, qs):
+        """
+        Return a list of ``{"id": ..., "text": ...}`` for the page.
+        """
+        if self.result_fields:
+            return [
+                {"id": row["pk"], "text": self.result_text.format(**row)}
+                for row in qs.values("pk", *self.result_fields)
+            ]
+        return [{"id": obj.pk, "text": self.result_text.format(obj=obj)} for obj in qs]
+
+    def get(self, request, *args, **kwargs):
+        if not any(request.user.has_perm(perm) for perm in self.permissions):
+            raise PermissionDenied
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+        qs = self.get_queryset()
+        terms = search_terms(request.GET.get("term", ""))
+        if terms:
+            qs, needs_distinct = get_search_backend(qs.db).search(
+                qs, self.search_fields, terms
+            )
+            if needs_distinct:
+                qs = qs.distinct()
+        start = (page - 1) * self.paginate_by
+        results = self.get_results(qs[start : start + self.paginate_by + 1])
+        return JsonResponse(
+            {
+                "results": results[: self.paginate_by],
+                "pagination": {"more": len(results) > self.paginate_by},
+            }
+        )
+
+
+class AdminStudentLookupView(AdminLookupView):
+    """
+    Active students, by student number, username or name.
+    """
+
+    model = Student
+    search_fields = ["student_number", "^person__username", "person__cn"]
+    ordering = ["person__sn", "person__given_name", "pk"]
+    result_fields = ["person__sn", "person__given_name", "student_number"]
+    result_text = "{person__sn}, {person__given_name} ({student_number})"
+
+
+class AdminSectionLookupView(AdminLookupView):
+    """
+    Active sections, by department and course code, section, CRN or year.
+    """
+
+    model = Section
+    search_fields = [
+        "course__department__code",
+        "course__code",
+        "section_name",
+        "crn",
+        "term__year",
+    ]
+    ordering = [
+        "-term__year",
+        "-term__term",
+        "course__department__code",
+        "course__code",
+        "section_name",
+    ]
+    select_related = ["course__department", "instructor", "term"]
+    result_text = "{obj} ({obj.term})"
+
+
+################################################################
+
+
+def roster_response(registrations, labels, filename):
+    """
+    Stream the roster of the registrations as a CSV attachment.
+    """
+    response = StreamingHttpResponse(
+        csv_lines(roster_rows(registrations, labels)), content_type="text/csv"
+    )
+    response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
+    return response
+
+
+class AdminRosterExportView(View):
+    """
+    The roster (CSV) of the active registrations in a section.
+    """
+
+    def get(self, request, section_pk):
+        section = get_object_or_404(Section, pk=section_pk)
+        registrations = Student_Registration.objects.filter(
+            section=section, active=True
+        )
+        return roster_response(
+            registrations, roster_labels([section]), "{}.csv".format(section.slug)
+        )
+
+
+################################################################
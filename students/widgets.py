@@ -0,0 +1,28 @@
+"""
+Widgets for the students application.
+"""
+#######################
+from __future__ import print_function, unicode_literals
+
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.urls import reverse
+
+#######################
+
+
+class LookupSelect(AutocompleteSelect):
+    """
+    An admin autocomplete widget backed by one of the students lookup
+    views (rather than the ``search_fields`` of a related ModelAdmin).
+    ``url_name`` is the name of the lookup url in the admin site.
+    """
+
+    def __init__(self, rel, admin_site, url_name, *args, **kwargs):
+        self.lookup_url_name = url_name
+        super(LookupSelect, self).__init__(rel, admin_site, *args, **kwargs)
+
+    def get_url(self):
+        return reverse("{}:{}".format(self.admin_site.name, self.lookup_url_name))
+
+
+#######################